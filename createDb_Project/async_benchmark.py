@@ -0,0 +1,152 @@
+import asyncio
+import json
+import random
+import time
+from datetime import datetime
+from async_io import CrateHttpClient, create_pg_pool, pg_pool_budget, PG_POOL_MIN_SIZE
+
+# --- Database Configuration (ADJUST THESE TO YOUR TEST INSTANCES) ---
+PG_HOST = "localhost"
+PG_PORT = 5436 # IMPORTANT: New PostgreSQL Port
+PG_DBNAME = "postgres"
+PG_USER = "postgres"
+PG_PASSWORD = "your_new_strong_password_v2" # IMPORTANT: Your new PG password
+
+CRATE_HOST = "localhost"
+CRATE_PORT = 4203 # IMPORTANT: New CrateDB Port (HTTP)
+
+RECORD_COUNT = 1000000 # Total records inserted per table
+OPERATIONS_PER_TEST = 10000
+CONCURRENCY_LEVELS = [1, 16, 64, 256] # Operations kept in flight at once
+INSERT_BULK_SIZE = 1000 # Rows per CrateDB bulk_args request in the bulk insert test
+RESULTS_FILE = "async_benchmark_results.json"
+
+
+async def run_concurrent(operation, count, concurrency):
+    """
+    Runs operation(i) for i in range(count) with at most `concurrency` in flight.
+    :return: (total seconds, sorted per-operation latencies, failures)
+    """
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one(i):
+        nonlocal failures
+        async with slots:
+            start_time = time.perf_counter()
+            try:
+                await operation(i)
+                latencies.append(time.perf_counter() - start_time)
+            except Exception:
+                failures += 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return time.perf_counter() - start_time, sorted(latencies), failures
+
+
+def summarize(db_type, test_name, concurrency, count, duration, latencies, failures, rows_per_op=1):
+    """
+    Throughput only counts operations that succeeded; failed ones are reported separately.
+    :param rows_per_op: Rows written per operation, to report rows/sec for bulk requests.
+    """
+    p50 = latencies[len(latencies) // 2] if latencies else 0.0
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+    succeeded = (count - failures) * rows_per_op
+    print(f"  {db_type} - {test_name} (concurrency {concurrency}): {succeeded / duration:.0f} ops/sec, "
+          f"p50 {p50 * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms, failures {failures}")
+    return {
+        "db_type": db_type,
+        "test_name": test_name,
+        "concurrency": concurrency,
+        "operations": count * rows_per_op,
+        "succeeded": succeeded,
+        "seconds": duration,
+        "ops_per_sec": succeeded / duration,
+        "p50_ms": p50 * 1000,
+        "p95_ms": p95 * 1000,
+        "failures": failures,
+    }
+
+
+async def main():
+    try:
+        # Concurrency is operations in flight, not backends: the pool stays within max_connections and
+        # operations beyond its size wait on acquire (that wait is part of their latency)
+        pg_pool_size = min(max(CONCURRENCY_LEVELS), await pg_pool_budget(PG_HOST, PG_PORT, PG_DBNAME, PG_USER, PG_PASSWORD))
+        # Benchmark writes are throwaway: keep them out of the sync change log even if capture is enabled
+        pg_pool = await create_pg_pool(PG_HOST, PG_PORT, PG_DBNAME, PG_USER, PG_PASSWORD,
+                                       min_size=min(PG_POOL_MIN_SIZE, pg_pool_size), max_size=pg_pool_size,
+                                       server_settings={"session_replication_role": "replica"})
+        print(f"Connected to PostgreSQL successfully! (pool of {pg_pool_size} connections)")
+    except Exception as e:
+        print(f"Error connecting to PostgreSQL (Port {PG_PORT}): {e}")
+        return
+
+    results = []
+    async with CrateHttpClient(CRATE_HOST, CRATE_PORT, pool_size=max(CONCURRENCY_LEVELS), max_in_flight=max(CONCURRENCY_LEVELS)) as crate:
+        print("\n--- Async Test 1: Concurrent Point Lookups by Primary Key ---")
+        lookup_ids = [random.randint(1, RECORD_COUNT) for _ in range(OPERATIONS_PER_TEST)]
+        for concurrency in CONCURRENCY_LEVELS:
+            stats = await run_concurrent(
+                lambda i: pg_pool.fetchrow("SELECT name, email, status FROM customers WHERE customer_id = $1", lookup_ids[i]),
+                OPERATIONS_PER_TEST, concurrency)
+            results.append(summarize("PostgreSQL", "Point Lookup", concurrency, OPERATIONS_PER_TEST, *stats))
+            stats = await run_concurrent(
+                lambda i: crate.execute("SELECT name, email, status FROM customers WHERE customer_id = ?", (lookup_ids[i],)),
+                OPERATIONS_PER_TEST, concurrency)
+            results.append(summarize("CrateDB", "Point Lookup", concurrency, OPERATIONS_PER_TEST, *stats))
+
+        print("\n--- Async Test 2: Concurrent Single-Row Inserts ---")
+        starting_id = RECORD_COUNT + 1 # Ensure no ID conflict, removed again below
+        for concurrency in CONCURRENCY_LEVELS:
+            now = datetime.now()
+            stats = await run_concurrent(
+                lambda i: pg_pool.execute(
+                    "INSERT INTO customers (customer_id, name, email, registration_date, status) VALUES ($1, $2, $3, $4, $5)",
+                    starting_id + i, f"Async {i}", f"async{i}@example.com", now, "active"),
+                OPERATIONS_PER_TEST, concurrency)
+            results.append(summarize("PostgreSQL", "Single-Row Insert", concurrency, OPERATIONS_PER_TEST, *stats))
+            stats = await run_concurrent(
+                lambda i: crate.execute(
+                    "INSERT INTO customers (customer_id, name, email, registration_date, status) VALUES (?, ?, ?, ?, ?)",
+                    (starting_id + i, f"Async {i}", f"async{i}@example.com", now, "active")),
+                OPERATIONS_PER_TEST, concurrency)
+            results.append(summarize("CrateDB", "Single-Row Insert", concurrency, OPERATIONS_PER_TEST, *stats))
+            await pg_pool.execute("DELETE FROM customers WHERE customer_id >= $1", starting_id)
+            await crate.execute("REFRESH TABLE customers") # Range deletes only see refreshed rows
+            await crate.execute("DELETE FROM customers WHERE customer_id >= ?", (starting_id,))
+
+        print("\n--- Async Test 3: Concurrent Bulk Inserts into CrateDB (bulk_args) ---")
+        chunks = OPERATIONS_PER_TEST // INSERT_BULK_SIZE
+
+        async def insert_chunk(chunk, now):
+            # bulk_args rejects rows with rowcount -2 instead of an error; count such a chunk as failed
+            rowcounts = await crate.execute_bulk(
+                "INSERT INTO customers (customer_id, name, email, registration_date, status) VALUES (?, ?, ?, ?, ?)",
+                [(starting_id + chunk * INSERT_BULK_SIZE + j, f"Bulk {j}", f"bulk{j}@example.com", now, "active")
+                 for j in range(INSERT_BULK_SIZE)])
+            failed = sum(1 for rowcount in rowcounts if rowcount == -2)
+            if failed:
+                raise RuntimeError(f"CrateDB rejected {failed} rows in a bulk insert")
+
+        for concurrency in CONCURRENCY_LEVELS:
+            now = datetime.now()
+            stats = await run_concurrent(lambda chunk: insert_chunk(chunk, now), chunks, concurrency)
+            # Report rows/sec rather than requests/sec for the bulk test
+            results.append(summarize("CrateDB", "Bulk Insert (rows)", concurrency, chunks, *stats, rows_per_op=INSERT_BULK_SIZE))
+            await crate.execute("REFRESH TABLE customers") # Range deletes only see refreshed rows
+            await crate.execute("DELETE FROM customers WHERE customer_id >= ?", (starting_id,))
+
+    await pg_pool.close()
+
+    with open(RESULTS_FILE, "w") as f:
+        json.dump({"run_at": datetime.now().isoformat(), "record_count": RECORD_COUNT, "pg_pool_size": pg_pool_size,
+                   "results": results}, f, indent=2)
+    print(f"\nResults written to {RESULTS_FILE}.")
+    print("Connections closed.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+import asyncio
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import aiohttp
+import asyncpg
+
+# --- Async I/O Configuration ---
+PG_POOL_MIN_SIZE = 4
+PG_POOL_MAX_SIZE = 32 # Concurrent PostgreSQL connections per process
+PG_CONNECTION_RESERVE = 10 # Server connections pg_pool_budget() leaves free for other clients (samplers, psql)
+CRATE_POOL_SIZE = 32 # Keep-alive HTTP connections to CrateDB
+CRATE_MAX_IN_FLIGHT = 128 # Requests allowed in flight at once; extra callers wait for a slot
+CRATE_REQUEST_TIMEOUT = 60 # Seconds
+
+
+class CrateHttpError(Exception):
+    """Raised when CrateDB's _sql endpoint answers with an error."""
+
+    def __init__(self, message, code=None, status=None):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+def _crate_json_default(value):
+    # Same conversions crate.client applies: timestamps as epoch milliseconds, decimals as floats
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__} for CrateDB")
+
+
+class CrateHttpClient:
+    """
+    Asynchronous client for CrateDB's HTTP endpoint (POST /_sql).
+
+    One aiohttp session keeps a pool of keep-alive connections, and a semaphore caps
+    how many requests are in flight, so callers can fire many statements with
+    asyncio.gather and they are sent over the pool concurrently instead of one round
+    trip at a time. execute_bulk() uses "bulk_args": one request runs the statement
+    for every parameter row.
+    """
+
+    def __init__(self, host, port, pool_size=CRATE_POOL_SIZE, max_in_flight=CRATE_MAX_IN_FLIGHT):
+        self.url = f"http://{host}:{port}/_sql"
+        self.pool_size = pool_size
+        self.max_in_flight = max_in_flight
+        self._session = None
+        self._slots = None
+
+    async def open(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            timeout=aiohttp.ClientTimeout(total=CRATE_REQUEST_TIMEOUT),
+            json_serialize=lambda payload: json.dumps(payload, default=_crate_json_default),
+        )
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _post(self, payload):
+        async with self._slots:
+            async with self._session.post(self.url, json=payload) as response:
+                body = await response.json(content_type=None)
+        if "error" in body:
+            error = body["error"]
+            raise CrateHttpError(error.get("message"), error.get("code"), response.status)
+        return body
+
+    async def execute(self, stmt, args=None):
+        """
+        Runs one statement.
+        :param stmt: SQL with ? (or $1) placeholders.
+        :param args: A sequence of parameters (or None).
+        :return: The response dict with "cols", "rows" and "rowcount".
+        """
+        payload = {"stmt": stmt}
+        if args is not None:
+            payload["args"] = list(args)
+        return await self._post(payload)
+
+    async def fetchall(self, stmt, args=None):
+        return (await self.execute(stmt, args))["rows"]
+
+    async def execute_bulk(self, stmt, bulk_args):
+        """
+        Runs one statement for many parameter rows in a single request.
+        :return: The per-row rowcounts (-2 marks a row that failed).
+        """
+        body = await self._post({"stmt": stmt, "bulk_args": [list(args) for args in bulk_args]})
+        return [result.get("rowcount") for result in body.get("results", [])]
+
+
+async def create_pg_pool(host, port, dbname, user, password, min_size=PG_POOL_MIN_SIZE, max_size=PG_POOL_MAX_SIZE, server_settings=None):
+    """
+    Opens an asyncpg connection pool. Queries use $1, $2 ... placeholders.
+    :param server_settings: Optional dict of session settings applied to every pooled connection.
+    """
+    return await asyncpg.create_pool(
+        host=host, port=port, database=dbname, user=user, password=password,
+        min_size=min_size, max_size=max_size, server_settings=server_settings,
+    )
+
+
+async def pg_pool_budget(host, port, dbname, user, password, reserve=PG_CONNECTION_RESERVE):
+    """
+    How many pooled connections this process can open without running into max_connections:
+    max_connections minus superuser_reserved_connections, the client connections already open and `reserve`.
+    Size pools with at most this; callers beyond the pool size wait on acquire instead of being refused.
+    """
+    conn = await asyncpg.connect(host=host, port=port, database=dbname, user=user, password=password)
+    try:
+        max_connections = int(await conn.fetchval("SHOW max_connections"))
+        superuser_reserved = int(await conn.fetchval("SHOW superuser_reserved_connections"))
+        in_use = await conn.fetchval("SELECT COUNT(*) FROM pg_stat_activity WHERE backend_type = 'client backend'")
+    finally:
+        await conn.close()
+    return max(1, max_connections - superuser_reserved - in_use - reserve)
@@ -0,0 +1,195 @@
+import asyncio
+import time
+from async_io import CrateHttpClient, create_pg_pool
+from parallel_sync_applier import TABLE_COLUMNS, UPSERT, plan_batch, partition_changes, upsert_sql, delete_sql
+from sync_service import (
+    FileCheckpointStore, INITIAL_CHECKPOINT, SERVICE_NAME, CHECKPOINT_STORE, SYNC_BATCH_SIZE,
+    POLL_INTERVAL, PRUNE_CHANGE_LOG, LOAD_CHECKPOINT_SQL, SAVE_CHECKPOINT_SQL, UPDATE_WATERMARK_SQL, OPEN_WINDOW_SQL,
+    checkpoint_from_row, checkpoint_args, watermark_args, open_window, close_window,
+    current_rows_sql, keys_by_table, current_row_changes, log_segments, clear_table_sql,
+)
+
+# --- Async Sync Configuration ---
+APPLY_PARTITIONS = 16 # Key partitions per stage, each sent as its own concurrent bulk request
+
+# Same position logic as sync_service.py (txid windows over sync_change_log, re-read current rows,
+# checkpoint after every applied page) and the same SQL, taken from its shared helpers; only the I/O
+# is asynchronous. The next log page is fetched
+# while the current one is being applied, but pages are still applied strictly one after another.
+
+
+class AsyncCrateCheckpointStore:
+    """Checkpoint kept in CrateDB's sync_checkpoints table, accessed over HTTP."""
+
+    def __init__(self, crate, service=SERVICE_NAME):
+        self.crate = crate
+        self.service = service
+
+    async def load(self):
+        rows = await self.crate.fetchall(LOAD_CHECKPOINT_SQL, (self.service,))
+        return checkpoint_from_row(rows[0] if rows else None)
+
+    async def save(self, checkpoint):
+        await self.crate.execute(SAVE_CHECKPOINT_SQL, checkpoint_args(self.service, checkpoint))
+
+
+class AsyncFileCheckpointStore:
+    """Async wrapper around FileCheckpointStore (the file is tiny, so it is written inline)."""
+
+    def __init__(self, path=None):
+        self.store = FileCheckpointStore(path) if path else FileCheckpointStore()
+
+    async def load(self):
+        return self.store.load()
+
+    async def save(self, checkpoint):
+        self.store.save(checkpoint)
+
+
+async def apply_batch_async(crate, changes, partitions=APPLY_PARTITIONS):
+    """
+    Async counterpart of ParallelApplier.apply_batch: same stages and key partitioning, but
+    every partition/table of a stage is one bulk_args request and all of them run concurrently.
+    """
+    applied = 0
+    for op, level, stage_changes in plan_batch(changes):
+        requests = []
+        for partition in partition_changes(stage_changes, partitions):
+            by_table = {}
+            for change in partition:
+                by_table.setdefault(change["table"], []).append(change)
+            for table, table_changes in by_table.items():
+                if op == UPSERT:
+                    columns = TABLE_COLUMNS[table]
+                    bulk_args = [[change["row"][column] for column in columns] for change in table_changes]
+                    requests.append(crate.execute_bulk(upsert_sql(table), bulk_args))
+                else:
+                    requests.append(crate.execute_bulk(delete_sql(table), [[change["pk"]] for change in table_changes]))
+        for rowcounts in await asyncio.gather(*requests): # Barrier between stages
+            failed = sum(1 for rowcount in rowcounts if rowcount == -2)
+            if failed:
+                raise RuntimeError(f"CrateDB rejected {failed} rows in a bulk {op}")
+        applied += len(stage_changes)
+    return applied
+
+
+class AsyncSyncService:
+    """
+    asyncio version of SyncService using an asyncpg pool and CrateDB's HTTP bulk endpoint.
+    :param pg_pool: asyncpg pool (see create_pg_pool).
+    :param crate: Open CrateHttpClient.
+    :param checkpoint_store: AsyncCrateCheckpointStore or AsyncFileCheckpointStore.
+    """
+
+    def __init__(self, pg_pool, crate, checkpoint_store, batch_size=SYNC_BATCH_SIZE):
+        self.pg_pool = pg_pool
+        self.crate = crate
+        self.store = checkpoint_store
+        self.batch_size = batch_size
+        self.checkpoint = None
+        self.changes_applied = 0
+
+    async def run(self, max_idle_polls=None):
+        self.checkpoint = await self.store.load() or dict(INITIAL_CHECKPOINT)
+        print(f"Resuming from checkpoint: {self.checkpoint}")
+        start_time = time.time()
+        idle_polls = 0
+        while max_idle_polls is None or idle_polls < max_idle_polls:
+            if self.checkpoint["window_hi"] is None:
+                await self._open_window()
+            fresh_window = self.checkpoint["last_change_id"] == 0
+            applied = await self._drain_window()
+            await self._close_window()
+            if applied:
+                idle_polls = 0
+            elif fresh_window:
+                # Same rule as SyncService.run: only sleep when a fresh window was empty
+                idle_polls += 1
+                await asyncio.sleep(POLL_INTERVAL)
+        print(f"Caught up: {self.changes_applied} changes applied in {time.time() - start_time:.2f} seconds.")
+
+    async def _fetch_page(self, after_change_id):
+        return await self.pg_pool.fetch(
+            "SELECT change_id, table_name, op, pk FROM sync_change_log "
+            "WHERE txid >= $1 AND txid < $2 AND change_id > $3 ORDER BY change_id LIMIT $4",
+            self.checkpoint["window_lo"], self.checkpoint["window_hi"], after_change_id, self.batch_size
+        )
+
+    async def _drain_window(self):
+        """Applies every page of the open window, prefetching the next page during each apply."""
+        applied = 0
+        page = await self._fetch_page(self.checkpoint["last_change_id"])
+        while page:
+            next_page = asyncio.ensure_future(self._fetch_page(page[-1]["change_id"]))
+            try:
+                for truncated_table, segment_rows in log_segments(page):
+                    if truncated_table:
+                        for stmt in clear_table_sql(truncated_table):
+                            await self.crate.execute(stmt)
+                    else:
+                        await apply_batch_async(self.crate, await self._current_row_changes(segment_rows))
+                self.checkpoint["last_change_id"] = page[-1]["change_id"]
+                await self.store.save(self.checkpoint) # Only after the page is in CrateDB; a crash before this replays it
+            except BaseException:
+                next_page.cancel() # Covers a failed checkpoint save (and cancellation) too, so the prefetch never leaks
+                raise
+            applied += len(page)
+            self.changes_applied += len(page)
+            print(f"  Applied {len(page)} changes (total {self.changes_applied}, checkpoint change_id {self.checkpoint['last_change_id']})")
+            page = await next_page
+        return applied
+
+    async def _open_window(self):
+        open_window(self.checkpoint, *await self.pg_pool.fetchrow(OPEN_WINDOW_SQL))
+        await self.store.save(self.checkpoint)
+
+    async def _close_window(self):
+        args = watermark_args(self.checkpoint["window_synced_at"])
+        if args:
+            await self.crate.execute(UPDATE_WATERMARK_SQL, args)
+        window_hi = close_window(self.checkpoint)
+        await self.store.save(self.checkpoint)
+        if PRUNE_CHANGE_LOG:
+            await self.pg_pool.execute("DELETE FROM sync_change_log WHERE txid < $1", window_hi)
+
+    async def _current_row_changes(self, log_rows):
+        async def read_table(table, pks):
+            rows = await self.pg_pool.fetch(current_rows_sql(table, "$1::int[]"), list(set(pks)))
+            return current_row_changes(table, pks, rows)
+
+        # One pooled connection per table, read concurrently; order within a table is kept
+        per_table = await asyncio.gather(*(read_table(table, pks) for table, pks in keys_by_table(log_rows).items()))
+        return [change for changes in per_table for change in changes]
+
+
+async def main():
+    PG_HOST = "localhost"
+    PG_PORT = 5436 # IMPORTANT: New PostgreSQL Port
+    PG_DBNAME = "postgres"
+    PG_USER = "postgres"
+    PG_PASSWORD = "your_new_strong_password_v2" # IMPORTANT: Your new PG password
+
+    CRATE_HOST = "localhost"
+    CRATE_PORT = 4203 # IMPORTANT: New CrateDB Port (HTTP)
+
+    try:
+        pg_pool = await create_pg_pool(PG_HOST, PG_PORT, PG_DBNAME, PG_USER, PG_PASSWORD)
+        print("Connected to PostgreSQL successfully!")
+    except Exception as e:
+        print(f"Error connecting to PostgreSQL (Port {PG_PORT}): {e}")
+        return
+
+    async with CrateHttpClient(CRATE_HOST, CRATE_PORT) as crate:
+        store = AsyncCrateCheckpointStore(crate) if CHECKPOINT_STORE == "crate" else AsyncFileCheckpointStore()
+        try:
+            await AsyncSyncService(pg_pool, crate, store).run()
+        finally:
+            await pg_pool.close()
+            print("Sync connections closed.")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nStopping async sync service (position is already checkpointed).")
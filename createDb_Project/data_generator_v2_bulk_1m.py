@@ -6,6 +6,9 @@ import random
 from datetime import datetime, timedelta
 import time
 import uuid
+import json
+import os
+import math
 
 fake = Faker()
 
@@ -19,62 +22,171 @@ PG_PASSWORD = "your_new_strong_password_v2" # !! IMPORTANT: Use the password set
 CRATE_HOST = "localhost"
 CRATE_PORT = 4203 # NEW CrateDB Port (HTTP/Admin UI)
 
-RECORD_COUNT = 1000000 # !! VERY HIGH DATA VOLUME: 1 Million records per table
+RECORD_COUNT = int(os.environ.get("RECORD_COUNT", 1000000)) # !! VERY HIGH DATA VOLUME: 1 Million records per table
+
+# Incremental loading: when LOAD_START_ID > 1 the existing rows are kept and only ids
+# LOAD_START_ID..RECORD_COUNT are generated and inserted (used by scaling_sweep.py to grow
+# the dataset step by step instead of reloading from zero).
+LOAD_START_ID = int(os.environ.get("LOAD_START_ID", 1))
+INGEST_RESULTS_FILE = os.environ.get("INGEST_RESULTS_FILE", "ingest_results.json")
+# Engines to clean up and load; scaling_sweep.py loads only CrateDB when it re-runs a size for a new shard count
+LOAD_ENGINES = os.environ.get("LOAD_ENGINES", "PostgreSQL,CrateDB").split(",")
+
+# --- Value Distribution Profiles ---
+# customer_zipf / product_zipf: Zipf exponent s for picking customer_id in orders and product_id
+#   in order_items (0 = uniform). Rank 1 is id 1, so the hottest keys are the lowest ids, which
+#   keeps the hot set stable when the dataset is grown incrementally.
+# order_dates: "uniform" over 5 years, or "seasonal_recent" (recent-heavy, with a Nov/Dec peak).
+# items_per_order: None = one item per id, each picking a random order (original behaviour); a number =
+#   mean basket size: every order gets a geometric number of items (at least one), so order_items
+#   holds about RECORD_COUNT * items_per_order rows.
+# category_skew: Zipf exponent over the product category list (0 = uniform).
+DISTRIBUTION_PROFILES = {
+    "uniform": {"customer_zipf": 0.0, "product_zipf": 0.0, "order_dates": "uniform", "items_per_order": None, "category_skew": 0.0},
+    "zipf": {"customer_zipf": 1.1, "product_zipf": 1.2, "order_dates": "uniform", "items_per_order": None, "category_skew": 1.0},
+    "production": {"customer_zipf": 1.0, "product_zipf": 1.1, "order_dates": "seasonal_recent", "items_per_order": 3.0, "category_skew": 0.8},
+}
+DISTRIBUTION_PROFILE = os.environ.get("DISTRIBUTION_PROFILE", "uniform")
+DISTRIBUTION = DISTRIBUTION_PROFILES[DISTRIBUTION_PROFILE]
+RECENT_ORDER_MEAN_DAYS = 365 # Mean order age for "seasonal_recent" dates
+MONTH_WEIGHTS = [0.8, 0.7, 0.9, 0.9, 1.0, 1.0, 0.9, 1.0, 1.0, 1.1, 1.6, 2.0] # Jan..Dec, relative order volume
+
+# Describes the loaded dataset (profile, seed and every load step); performance_tester_v2.py copies it into its results
+DATASET_PROFILE_FILE = "dataset_profile.json"
+existing_dataset = None
+if LOAD_START_ID > 1 and os.path.exists(DATASET_PROFILE_FILE):
+    with open(DATASET_PROFILE_FILE) as f:
+        existing_dataset = json.load(f)
+
+# Seed for reproducible datasets; a random one is picked (and recorded) when not given.
+# Incremental loads default to the seed of the dataset they extend.
+# Each incremental step seeds with RANDOM_SEED + LOAD_START_ID so steps do not repeat each other.
+if "RANDOM_SEED" in os.environ:
+    RANDOM_SEED = int(os.environ["RANDOM_SEED"])
+elif existing_dataset is not None:
+    RANDOM_SEED = existing_dataset["random_seed"]
+else:
+    RANDOM_SEED = random.randrange(2 ** 32)
+random.seed(RANDOM_SEED + LOAD_START_ID)
+Faker.seed(RANDOM_SEED + LOAD_START_ID)
 
 # --- Optimized Batch Sizes for Medium Hardware ---
 # Adjust these based on your system's RAM and CPU.
 # Larger is generally faster, up to a point where memory/network becomes a bottleneck.
 PG_BATCH_SIZE = 100000 # Increased for execute_values, try 50k-200k
 CRATE_BULK_CHUNK_SIZE = 100000 # Can go higher for CrateDB, try 50k-200k
+# Ids generated and inserted per round; only one round of rows is held in memory, so 10M+ loads fit in RAM
+LOAD_CHUNK_SIZE = CRATE_BULK_CHUNK_SIZE
+
+# --- Distribution Samplers ---
+def make_zipf_sampler(n, s):
+    """
+    Returns a function drawing ids 1..n with P(id) proportional to 1 / id**s (uniform for s == 0).
+    Uses rejection-inversion sampling (Hoermann & Derflinger), so memory stays constant however large n is.
+    """
+    if s == 0:
+        return lambda: random.randint(1, n)
+
+    def log1p_ratio(x): # log1p(x) / x, stable near 0
+        return math.log1p(x) / x if abs(x) > 1e-8 else 1 - x * (0.5 - x * (1 / 3 - 0.25 * x))
+
+    def expm1_ratio(x): # expm1(x) / x, stable near 0
+        return math.expm1(x) / x if abs(x) > 1e-8 else 1 + x * 0.5 * (1 + x / 3 * (1 + 0.25 * x))
+
+    def h_integral(x): # Integral of 1 / x**s (also correct for s == 1)
+        log_x = math.log(x)
+        return expm1_ratio((1 - s) * log_x) * log_x
+
+    def h_integral_inverse(x):
+        return math.exp(log1p_ratio(max(x * (1 - s), -1)) * x)
+
+    h_integral_x1 = h_integral(1.5) - 1
+    h_integral_n = h_integral(n + 0.5)
+    squeeze = 2 - h_integral_inverse(h_integral(2.5) - 2 ** -s)
+
+    def sample():
+        while True:
+            u = h_integral_n + random.random() * (h_integral_x1 - h_integral_n)
+            x = h_integral_inverse(u)
+            k = min(max(int(x + 0.5), 1), n)
+            if k - x <= squeeze or u >= h_integral(k + 0.5) - k ** -s:
+                return k
+    return sample
+
+def make_date_sampler(mode):
+    """Returns a function drawing a timestamp in the last 5 years for the given order_dates mode."""
+    if mode == "uniform":
+        return lambda: fake.date_time_between(start_date="-5y", end_date="now")
+    now = datetime.now()
+    max_days = 5 * 365
+    max_month_weight = max(MONTH_WEIGHTS)
+
+    def sample():
+        while True: # Rejection sampling: exponential age, thinned by month weight
+            days_ago = random.expovariate(1.0 / RECENT_ORDER_MEAN_DAYS)
+            if days_ago >= max_days:
+                continue
+            candidate = now - timedelta(days=days_ago)
+            if random.random() * max_month_weight <= MONTH_WEIGHTS[candidate.month - 1]:
+                return candidate.replace(microsecond=0)
+    return sample
+
+def make_category_sampler(categories, skew):
+    weights = [1.0 / rank ** skew for rank in range(1, len(categories) + 1)]
+    return lambda: random.choices(categories, weights=weights)[0]
 
 # --- Data Generation Functions ---
 # (These remain the same, as the speedup is in insertion)
-def generate_customers(count):
-    print(f"Generating {count} customers...")
+def generate_customers(count, start_id=1):
+    print(f"Generating {count - start_id + 1} customers...")
     customers = []
-    for i in range(1, count + 1):
+    for i in range(start_id, count + 1):
         customers.append((
             i,  # customer_id
             fake.name(),
-            fake.unique.email(), # Keep unique for primary key, but know it adds overhead
+            f"{fake.user_name()}.{i}@{fake.free_email_domain()}", # The id keeps it unique without Faker's ever-growing unique set
             fake.date_time_between(start_date="-5y", end_date="now"), # Wider date range
             random.choice(["active", "inactive", "pending"])
         ))
     return customers
 
-def generate_products(count):
-    print(f"Generating {count} products...")
+def generate_products(count, start_id=1):
+    print(f"Generating {count - start_id + 1} products...")
     products = []
     categories = ["Electronics", "Clothing", "Books", "Home", "Sports", "Food", "Toys", "Automotive", "Beauty", "Garden"]
-    for i in range(1, count + 1):
+    pick_category = make_category_sampler(categories, DISTRIBUTION["category_skew"])
+    for i in range(start_id, count + 1):
         products.append((
             i,  # product_id
             fake.word().capitalize() + " " + fake.color_name(),
             fake.text(max_nb_chars=200), # Longer description for FTS
             round(random.uniform(9.99, 999.99), 2),
-            random.choice(categories)
+            pick_category()
         ))
     return products
 
-def generate_orders(count, customer_count):
-    print(f"Generating {count} orders...")
+def generate_orders(count, customer_count, start_id=1):
+    print(f"Generating {count - start_id + 1} orders...")
     orders = []
-    for i in range(1, count + 1):
+    pick_customer = make_zipf_sampler(customer_count, DISTRIBUTION["customer_zipf"])
+    pick_order_date = make_date_sampler(DISTRIBUTION["order_dates"])
+    for i in range(start_id, count + 1):
         orders.append((
             i,  # order_id
-            random.randint(1, customer_count),
-            fake.date_time_between(start_date="-5y", end_date="now"), # Wider date range for time-series
+            pick_customer(),
+            pick_order_date(), # Wider date range for time-series
             round(random.uniform(10.00, 5000.00), 2),
             random.choice(["completed", "processing", "shipped", "cancelled"])
         ))
     return orders
 
-def generate_order_items(count, order_count, product_count):
-    print(f"Generating {count} order_items...")
+def generate_order_items(count, order_count, product_count, start_id=1):
+    print(f"Generating {count - start_id + 1} order_items...")
     items = []
-    for i in range(1, count + 1):
+    pick_product = make_zipf_sampler(product_count, DISTRIBUTION["product_zipf"])
+    for i in range(start_id, count + 1):
         order_id = random.randint(1, order_count)
-        product_id = random.randint(1, product_count)
+        product_id = pick_product()
         unit_price = round(random.uniform(9.99, 499.99), 2)
         quantity = random.randint(1, 10)
         
@@ -87,11 +199,37 @@ def generate_order_items(count, order_count, product_count):
         ))
     return items
 
-def generate_inventory(count, product_count):
-    print(f"Generating {count} inventory records...")
+def generate_order_baskets(order_end, product_count, order_start, first_item_id):
+    """
+    Generates the order_items of orders order_start..order_end for profiles with items_per_order:
+    each order gets a geometric basket size with that mean. Item ids run on from first_item_id, so the
+    caller carries the next id across chunks and incremental load steps.
+    """
+    print(f"Generating order_items for orders {order_start}..{order_end}...")
+    items = []
+    pick_product = make_zipf_sampler(product_count, DISTRIBUTION["product_zipf"])
+    mean_items = DISTRIBUTION["items_per_order"]
+    item_id = first_item_id
+    for order_id in range(order_start, order_end + 1):
+        basket_size = 1
+        while random.random() > 1.0 / mean_items:
+            basket_size += 1
+        for _ in range(basket_size):
+            items.append((
+                item_id,
+                order_id,
+                pick_product(),
+                random.randint(1, 10), # quantity
+                round(random.uniform(9.99, 499.99), 2) # unit_price
+            ))
+            item_id += 1
+    return items
+
+def generate_inventory(count, product_count, start_id=1):
+    print(f"Generating {count - start_id + 1} inventory records...")
     inventory = []
     warehouses = ["North", "South", "East", "West", "Central", "Online Fulfillment"]
-    for i in range(1, count + 1):
+    for i in range(start_id, count + 1):
         inventory.append((
             i,  # inventory_id
             random.randint(1, product_count),
@@ -107,6 +245,9 @@ try:
     # Set autocommit to False for better bulk insert performance (commit explicitly at end of table insert)
     pg_conn.autocommit = False 
     pg_cursor = pg_conn.cursor()
+    # This script writes CrateDB itself, so skip the sync change-capture triggers (needs superuser)
+    pg_cursor.execute("SET session_replication_role = replica;")
+    pg_conn.commit()
     print("Connected to PostgreSQL successfully!")
 except Exception as e:
     print(f"Error connecting to PostgreSQL (Port {PG_PORT}): {e}")
@@ -129,7 +270,7 @@ def cleanup_data(pg_cursor, crate_cursor):
     # PostgreSQL Cleanup
     pg_start_time = time.time()
     try:
-        for table in tables:
+        for table in (tables if "PostgreSQL" in LOAD_ENGINES else []):
             pg_cursor.execute(f"TRUNCATE TABLE {table} RESTART IDENTITY CASCADE;") # CASCADE handles FK dependencies
             pg_conn.commit()
             print(f"  PostgreSQL: Truncated {table}.")
@@ -141,7 +282,7 @@ def cleanup_data(pg_cursor, crate_cursor):
     # CrateDB Cleanup - Changed from TRUNCATE to DELETE FROM
     crate_start_time = time.time()
     try:
-        for table in tables:
+        for table in (tables if "CrateDB" in LOAD_ENGINES else []):
             # CrateDB does not support TRUNCATE in the same way; use DELETE FROM
             crate_cursor.execute(f"DELETE FROM {table};")
             # CrateDB DELETE is implicitly committed or committed with next DDL/DML.
@@ -153,7 +294,9 @@ def cleanup_data(pg_cursor, crate_cursor):
 
 # --- Insertion Helper Function (Optimized for CrateDB Bulk & PG execute_values) ---
 def insert_data_in_batches(db_cursor, db_conn, table_name, columns, data, is_crate=False):
+    """Inserts data and returns the number of rows that actually made it into the table."""
     print(f"  Inserting into {table_name}...")
+    inserted = 0
     column_str = ", ".join(columns)
     
     if is_crate:
@@ -164,7 +307,12 @@ def insert_data_in_batches(db_cursor, db_conn, table_name, columns, data, is_cra
             chunk = data[i:i + CRATE_BULK_CHUNK_SIZE]
             try:
                 # CrateDB's client.execute with a list of tuples automatically does a bulk insert efficiently
-                db_cursor.executemany(insert_sql, chunk) 
+                results = db_cursor.executemany(insert_sql, chunk) 
+                # Rejected rows come back as rowcount -2 instead of raising
+                rejected = sum(1 for result in results or [] if result.get("rowcount") == -2)
+                inserted += len(chunk) - rejected
+                if rejected:
+                    print(f"    CrateDB rejected {rejected} of {len(chunk)} rows in {table_name} at chunk {i}")
                 print(f"    Inserted {i + len(chunk)} records into {table_name} (CrateDB - Bulk)")
             except Exception as e:
                 print(f"    Error during CrateDB bulk insert into {table_name} at chunk {i}: {e}")
@@ -180,55 +328,135 @@ def insert_data_in_batches(db_cursor, db_conn, table_name, columns, data, is_cra
             # It builds a single INSERT statement with multiple VALUES clauses
             psycopg2.extras.execute_values(db_cursor, insert_sql, data, page_size=PG_BATCH_SIZE)
             db_conn.commit() # Commit once after all data for the table is sent
+            inserted = len(data)
             print(f"    Inserted {len(data)} records into {table_name} (PostgreSQL - execute_values)")
         except Exception as e:
             print(f"    Error during PostgreSQL bulk insert into {table_name}: {e}")
             db_conn.rollback() # Rollback the entire table's insertion if an error occurs
 
-    print(f"  Finished inserting {len(data)} records into {table_name}.")
+    print(f"  Finished inserting {inserted} of {len(data)} records into {table_name}.")
+    return inserted
 
 # --- Main Data Ingestion Process ---
 print("\n--- Starting Data Ingestion ---")
+print(f"Distribution profile: {DISTRIBUTION_PROFILE} {DISTRIBUTION} (seed {RANDOM_SEED})")
+# An incremental load must extend a dataset generated the same way, or the recorded profile would be wrong
+if LOAD_START_ID > 1:
+    if existing_dataset is None:
+        print(f"Refusing incremental load: {DATASET_PROFILE_FILE} not found, the existing rows' profile is unknown.")
+        exit(1)
+    if (existing_dataset["distribution_profile"], existing_dataset["distribution"], existing_dataset["random_seed"]) != \
+            (DISTRIBUTION_PROFILE, DISTRIBUTION, RANDOM_SEED):
+        print(f"Refusing incremental load: dataset was generated with profile '{existing_dataset['distribution_profile']}' "
+              f"(seed {existing_dataset['random_seed']}), this run uses '{DISTRIBUTION_PROFILE}' (seed {RANDOM_SEED}). "
+              f"Reload from LOAD_START_ID=1 to change the profile.")
+        exit(1)
+    if "next_item_id" not in existing_dataset:
+        print(f"Refusing incremental load: {DATASET_PROFILE_FILE} does not record next_item_id (written by an older loader).")
+        exit(1)
 total_start_time = time.time()
 
-# 1. Clean up existing data
-cleanup_data(pg_cursor, crate_cursor)
-
-# 2. Generate all data in memory
-print("\n--- Generating All Data in Memory ---")
-all_customers = generate_customers(RECORD_COUNT)
-all_products = generate_products(RECORD_COUNT)
-all_orders = generate_orders(RECORD_COUNT, RECORD_COUNT)
-all_order_items = generate_order_items(RECORD_COUNT, RECORD_COUNT, RECORD_COUNT)
-all_inventory = generate_inventory(RECORD_COUNT, RECORD_COUNT)
-
-data_to_insert = {
-    "customers": (all_customers, ["customer_id", "name", "email", "registration_date", "status"]),
-    "products": (all_products, ["product_id", "name", "description", "price", "category"]),
-    "orders": (all_orders, ["order_id", "customer_id", "order_date", "total_amount", "status"]),
-    "order_items": (all_order_items, ["item_id", "order_id", "product_id", "quantity", "unit_price"]),
-    "inventory": (all_inventory, ["inventory_id", "product_id", "quantity", "warehouse", "last_updated"])
+# 1. Clean up existing data (skipped when appending to an already loaded dataset)
+if LOAD_START_ID > 1:
+    print(f"\n--- Incremental load: keeping ids 1..{LOAD_START_ID - 1}, adding {LOAD_START_ID}..{RECORD_COUNT} ---")
+else:
+    cleanup_data(pg_cursor, crate_cursor)
+
+table_columns = {
+    "customers": ["customer_id", "name", "email", "registration_date", "status"],
+    "products": ["product_id", "name", "description", "price", "category"],
+    "orders": ["order_id", "customer_id", "order_date", "total_amount", "status"],
+    "order_items": ["item_id", "order_id", "product_id", "quantity", "unit_price"],
+    "inventory": ["inventory_id", "product_id", "quantity", "warehouse", "last_updated"]
 }
 
-# 3. Insert into PostgreSQL
-print("\nInserting data into PostgreSQL...")
-pg_insert_start_time = time.time()
-for table_name, (data, columns) in data_to_insert.items():
-    insert_data_in_batches(pg_cursor, pg_conn, table_name, columns, data, is_crate=False)
-pg_insert_end_time = time.time()
-print(f"PostgreSQL data insertion completed in {pg_insert_end_time - pg_insert_start_time:.2f} seconds.")
-
-# 4. Insert into CrateDB
-print("\nInserting data into CrateDB...")
-crate_insert_start_time = time.time()
-for table_name, (data, columns) in data_to_insert.items():
-    insert_data_in_batches(crate_cursor, crate_conn, table_name, columns, data, is_crate=True)
-crate_insert_end_time = time.time()
-print(f"CrateDB data insertion completed in {crate_insert_end_time - crate_insert_start_time:.2f} seconds.")
+# 2-4. Generate and insert one chunk of ids at a time (both engines get the same rows)
+# Basket profiles give order_items their own id sequence; the next id carries over chunks and load steps
+next_item_id = existing_dataset["next_item_id"] if LOAD_START_ID > 1 else 1
+generation_seconds = 0.0
+pg_insert_seconds = 0.0
+crate_insert_seconds = 0.0
+rows_generated = 0
+pg_rows_inserted = 0
+crate_rows_inserted = 0
+for chunk_start in range(LOAD_START_ID, RECORD_COUNT + 1, LOAD_CHUNK_SIZE):
+    chunk_end = min(chunk_start + LOAD_CHUNK_SIZE - 1, RECORD_COUNT)
+    print(f"\n--- Generating ids {chunk_start}..{chunk_end} ---")
+    generation_start_time = time.time()
+    data_to_insert = {
+        "customers": generate_customers(chunk_end, chunk_start),
+        "products": generate_products(chunk_end, chunk_start),
+        "orders": generate_orders(chunk_end, RECORD_COUNT, chunk_start),
+        "order_items": (generate_order_baskets(chunk_end, RECORD_COUNT, chunk_start, next_item_id)
+                        if DISTRIBUTION["items_per_order"] else
+                        generate_order_items(chunk_end, RECORD_COUNT, RECORD_COUNT, chunk_start)),
+        "inventory": generate_inventory(chunk_end, RECORD_COUNT, chunk_start),
+    }
+    next_item_id = data_to_insert["order_items"][-1][0] + 1
+    generation_seconds += time.time() - generation_start_time
+    rows_generated += sum(len(data) for data in data_to_insert.values())
+
+    if "PostgreSQL" in LOAD_ENGINES:
+        print("\nInserting chunk into PostgreSQL...")
+        pg_insert_start_time = time.time()
+        for table_name, data in data_to_insert.items():
+            pg_rows_inserted += insert_data_in_batches(pg_cursor, pg_conn, table_name, table_columns[table_name], data, is_crate=False)
+        pg_insert_seconds += time.time() - pg_insert_start_time
+
+    if "CrateDB" in LOAD_ENGINES:
+        print("\nInserting chunk into CrateDB...")
+        crate_insert_start_time = time.time()
+        for table_name, data in data_to_insert.items():
+            crate_rows_inserted += insert_data_in_batches(crate_cursor, crate_conn, table_name, table_columns[table_name], data, is_crate=True)
+        crate_insert_seconds += time.time() - crate_insert_start_time
+
+if "PostgreSQL" in LOAD_ENGINES:
+    print(f"PostgreSQL data insertion completed in {pg_insert_seconds:.2f} seconds ({pg_rows_inserted} of {rows_generated} rows).")
+if "CrateDB" in LOAD_ENGINES:
+    print(f"CrateDB data insertion completed in {crate_insert_seconds:.2f} seconds ({crate_rows_inserted} of {rows_generated} rows).")
 
 total_end_time = time.time()
 print(f"\n--- Total Data Ingestion Time (including cleanup): {total_end_time - total_start_time:.2f} seconds ---")
 
+# --- Save ingestion stats (read by scaling_sweep.py) ---
+# Rates use rows that actually landed; an engine that was not loaded reports None
+with open(INGEST_RESULTS_FILE, "w") as f:
+    json.dump({
+        "record_count": RECORD_COUNT,
+        "start_id": LOAD_START_ID,
+        "load_engines": LOAD_ENGINES,
+        "rows_generated": rows_generated,
+        "pg_rows_inserted": pg_rows_inserted if "PostgreSQL" in LOAD_ENGINES else None,
+        "crate_rows_inserted": crate_rows_inserted if "CrateDB" in LOAD_ENGINES else None,
+        "generation_seconds": generation_seconds,
+        "pg_insert_seconds": pg_insert_seconds,
+        "crate_insert_seconds": crate_insert_seconds,
+        "pg_rows_per_sec": pg_rows_inserted / pg_insert_seconds if pg_insert_seconds > 0 else None,
+        "crate_rows_per_sec": crate_rows_inserted / crate_insert_seconds if crate_insert_seconds > 0 else None,
+        "distribution_profile": DISTRIBUTION_PROFILE,
+        "distribution": DISTRIBUTION,
+        "random_seed": RANDOM_SEED,
+    }, f, indent=2)
+print(f"Ingestion stats written to {INGEST_RESULTS_FILE}.")
+
+load_step = {
+    "start_id": LOAD_START_ID,
+    "record_count": RECORD_COUNT,
+    "load_engines": LOAD_ENGINES,
+    "loaded_at": datetime.now().isoformat(),
+}
+with open(DATASET_PROFILE_FILE, "w") as f:
+    json.dump({
+        "record_count": RECORD_COUNT,
+        "distribution_profile": DISTRIBUTION_PROFILE,
+        "distribution": DISTRIBUTION,
+        "random_seed": RANDOM_SEED,
+        "next_item_id": next_item_id, # order_items holds next_item_id - 1 rows
+        "loaded_at": load_step["loaded_at"],
+        "steps": (existing_dataset.get("steps", []) if existing_dataset else []) + [load_step],
+    }, f, indent=2)
+print(f"Dataset profile written to {DATASET_PROFILE_FILE}.")
+
 # --- Close connections ---
 pg_cursor.close()
 pg_conn.close()
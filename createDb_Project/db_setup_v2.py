@@ -1,6 +1,7 @@
 import psycopg2
 from crate import client as crate_client
 import time
+import os
 
 # --- Configuration for NEW instances ---
 PG_HOST = "localhost"
@@ -12,6 +13,16 @@ PG_PASSWORD = "your_new_strong_password_v2" # !! IMPORTANT: Use the password set
 CRATE_HOST = "localhost"
 CRATE_PORT = 4203 # New CrateDB Port
 
+# --- Optional overrides (used by scaling_sweep.py) ---
+CRATE_SHARDS = int(os.environ.get("CRATE_SHARDS", 0)) # Data tables only; 0 = CrateDB default shard count
+# Change-capture triggers for sync_service.py are opt-in: they add a trigger call and a log insert to
+# every PostgreSQL write, which would skew the benchmarks. Run with 0 to remove previously installed ones.
+ENABLE_CHANGE_CAPTURE = os.environ.get("ENABLE_CHANGE_CAPTURE", "0") == "1"
+# Drop the data tables first: "1" = both databases, "crate" = CrateDB only (a new shard count does not affect PostgreSQL)
+RECREATE_TABLES = os.environ.get("RECREATE_TABLES", "0")
+RECREATE_PG_TABLES = RECREATE_TABLES == "1"
+RECREATE_CRATE_TABLES = RECREATE_TABLES in ("1", "crate")
+
 # --- Database Schema Definitions ---
 # Note: CrateDB does not enforce FOREIGN KEY constraints, they are for documentation.
 # CrateDB also uses 'STRING' instead of 'VARCHAR' and 'FLOAT' instead of 'NUMERIC'.
@@ -64,6 +75,82 @@ tables_schema = [
     """
 ]
 
+# Sync bookkeeping tables are kept apart from the data tables: RECREATE_TABLES and CRATE_SHARDS
+# only apply to the data tables, so benchmark sweeps never drop the sync position.
+pg_sync_tables_schema = [
+    # Change log filled by triggers (see change_capture_sql) and consumed by sync_service.py.
+    # txid lets the consumer only read changes whose transactions have finished.
+    """
+    CREATE TABLE IF NOT EXISTS sync_change_log (
+        change_id BIGSERIAL PRIMARY KEY,
+        txid BIGINT NOT NULL DEFAULT txid_current(),
+        table_name VARCHAR(50) NOT NULL,
+        op VARCHAR(10) NOT NULL,
+        pk INTEGER, -- NULL for TRUNCATE markers
+        changed_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+    )
+    """
+]
+
+# PostgreSQL change capture: every row change on the 5 tables logs (table, op, primary key).
+# The sync service re-reads the current row when applying, so the log only marks keys as dirty.
+# TRUNCATE fires no row triggers, so a statement trigger logs a (table, 'TRUNCATE', NULL) marker
+# and the sync service empties that CrateDB table at that point in the log.
+# Bulk loaders that write both databases themselves can skip it with SET session_replication_role = replica.
+SYNCED_TABLE_KEYS = {
+    "customers": "customer_id",
+    "products": "product_id",
+    "orders": "order_id",
+    "order_items": "item_id",
+    "inventory": "inventory_id",
+}
+change_capture_sql = [
+    "CREATE INDEX IF NOT EXISTS sync_change_log_txid_idx ON sync_change_log (txid, change_id)",
+    "ALTER TABLE sync_change_log ALTER COLUMN pk DROP NOT NULL", # Change logs created before TRUNCATE markers
+    """
+    CREATE OR REPLACE FUNCTION log_sync_change() RETURNS trigger AS $$
+    DECLARE
+        old_pk INTEGER;
+        new_pk INTEGER;
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            old_pk := (to_jsonb(OLD) ->> TG_ARGV[0])::INTEGER;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            new_pk := (to_jsonb(NEW) ->> TG_ARGV[0])::INTEGER;
+        END IF;
+        IF old_pk IS NOT NULL AND old_pk IS DISTINCT FROM new_pk THEN
+            INSERT INTO sync_change_log (table_name, op, pk) VALUES (TG_TABLE_NAME, 'DELETE', old_pk);
+        END IF;
+        IF new_pk IS NOT NULL THEN
+            INSERT INTO sync_change_log (table_name, op, pk) VALUES (TG_TABLE_NAME, TG_OP, new_pk);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION log_sync_truncate() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO sync_change_log (table_name, op, pk) VALUES (TG_TABLE_NAME, 'TRUNCATE', NULL);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+]
+for table, key in SYNCED_TABLE_KEYS.items():
+    change_capture_sql.append(f"DROP TRIGGER IF EXISTS {table}_sync_change ON {table}")
+    change_capture_sql.append(f"DROP TRIGGER IF EXISTS {table}_sync_truncate ON {table}")
+    if ENABLE_CHANGE_CAPTURE:
+        change_capture_sql.append(
+            f"CREATE TRIGGER {table}_sync_change AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION log_sync_change('{key}')"
+        )
+        change_capture_sql.append(
+            f"CREATE TRIGGER {table}_sync_truncate AFTER TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION log_sync_truncate()"
+        )
+
 # CrateDB specific schema adjustments (including FULLTEXT index and additional regular indexes)
 crate_tables_schema = [
     """
@@ -117,6 +204,28 @@ crate_tables_schema = [
     """
 ]
 
+crate_sync_tables_schema = [
+    # Sync bookkeeping: sync_service.py (the only writer) records the PostgreSQL commit time it has replicated up to,
+    # so readers (query_router.py) can tell how stale CrateDB is.
+    """
+    CREATE TABLE IF NOT EXISTS sync_watermark (
+        source STRING PRIMARY KEY,
+        synced_at TIMESTAMP
+    )
+    """,
+    # Position of the sync service in PostgreSQL's sync_change_log, saved after every applied batch
+    """
+    CREATE TABLE IF NOT EXISTS sync_checkpoints (
+        service STRING PRIMARY KEY,
+        window_lo BIGINT,
+        window_hi BIGINT,
+        last_change_id BIGINT,
+        window_synced_at DOUBLE,
+        updated_at TIMESTAMP
+    )
+    """
+]
+
 
 # --- Connect to PostgreSQL ---
 try:
@@ -136,9 +245,17 @@ except Exception as e:
     print(f"Error connecting to CrateDB: {e}")
     exit()
 
+def table_name_of(table_sql):
+    return table_sql.split('TABLE IF NOT EXISTS ')[1].split(' ')[0]
+
 # --- Create tables in PostgreSQL ---
 print("\nCreating tables in PostgreSQL...")
 start_time_pg = time.time()
+if RECREATE_PG_TABLES:
+    for table_sql in tables_schema:
+        pg_cursor.execute(f"DROP TABLE IF EXISTS {table_name_of(table_sql)} CASCADE;")
+        pg_conn.commit()
+    print("  PostgreSQL: Dropped existing tables.")
 for table_sql in tables_schema:
     try:
         pg_cursor.execute(table_sql)
@@ -146,6 +263,26 @@ for table_sql in tables_schema:
         print(f"  PostgreSQL: Created table: {table_sql.split('TABLE IF NOT EXISTS ')[1].split(' ')[0]}")
     except Exception as e:
         print(f"  PostgreSQL Error creating table: {e} - SQL: {table_sql}")
+        pg_conn.rollback()
+for table_sql in pg_sync_tables_schema:
+    try:
+        pg_cursor.execute(table_sql)
+        pg_conn.commit()
+        print(f"  PostgreSQL: Created sync table: {table_name_of(table_sql)}")
+    except Exception as e:
+        print(f"  PostgreSQL Error creating sync table: {e} - SQL: {table_sql}")
+        pg_conn.rollback()
+for capture_sql in change_capture_sql:
+    try:
+        pg_cursor.execute(capture_sql)
+        pg_conn.commit()
+    except Exception as e:
+        print(f"  PostgreSQL Error setting up change capture: {e} - SQL: {capture_sql}")
+        pg_conn.rollback()
+if ENABLE_CHANGE_CAPTURE:
+    print(f"  PostgreSQL: Change capture triggers installed on {len(SYNCED_TABLE_KEYS)} tables.")
+else:
+    print("  PostgreSQL: Change capture disabled (set ENABLE_CHANGE_CAPTURE=1 to use sync_service.py).")
 pg_cursor.close()
 pg_conn.close()
 end_time_pg = time.time()
@@ -154,12 +291,24 @@ print(f"PostgreSQL tables created in {end_time_pg - start_time_pg:.2f} seconds."
 # --- Create tables in CrateDB ---
 print("\nCreating tables in CrateDB...")
 start_time_crate = time.time()
+if RECREATE_CRATE_TABLES:
+    for table_sql in crate_tables_schema:
+        crate_cursor.execute(f"DROP TABLE IF EXISTS {table_name_of(table_sql)};")
+    print("  CrateDB: Dropped existing tables.")
 for table_sql in crate_tables_schema: # Use crate_tables_schema for CrateDB
+    if CRATE_SHARDS:
+        table_sql = f"{table_sql.rstrip()} CLUSTERED INTO {CRATE_SHARDS} SHARDS"
     try:
         crate_cursor.execute(table_sql)
         print(f"  CrateDB: Created table: {table_sql.split('TABLE IF NOT EXISTS ')[1].split(' ')[0]}")
     except Exception as e:
         print(f"  CrateDB Error creating table: {e} - SQL: {table_sql}")
+for table_sql in crate_sync_tables_schema: # Default shard count; these tables hold a handful of rows
+    try:
+        crate_cursor.execute(table_sql)
+        print(f"  CrateDB: Created sync table: {table_name_of(table_sql)}")
+    except Exception as e:
+        print(f"  CrateDB Error creating sync table: {e} - SQL: {table_sql}")
 crate_conn.close() # CrateDB client auto-commits DDL, but good practice to close
 end_time_crate = time.time()
 print(f"CrateDB tables created in {end_time_crate - start_time_crate:.2f} seconds.")
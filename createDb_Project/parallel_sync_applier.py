@@ -0,0 +1,202 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from crate import client as crate_client
+
+# --- Applier Configuration ---
+DEFAULT_WORKER_COUNT = 4 # CrateDB connections applying changes in parallel
+
+# Column order per table (same as the loader in data_generator_v2_bulk_1m.py)
+TABLE_COLUMNS = {
+    "customers": ["customer_id", "name", "email", "registration_date", "status"],
+    "products": ["product_id", "name", "description", "price", "category"],
+    "orders": ["order_id", "customer_id", "order_date", "total_amount", "status"],
+    "order_items": ["item_id", "order_id", "product_id", "quantity", "unit_price"],
+    "inventory": ["inventory_id", "product_id", "quantity", "warehouse", "last_updated"],
+}
+PRIMARY_KEYS = {table: columns[0] for table, columns in TABLE_COLUMNS.items()}
+
+# Dependency level of each table: a table only references tables with a lower level
+# (orders -> customers, inventory -> products, order_items -> orders/products).
+# Upserts are applied parent level first, deletes child level first, so readers never
+# see an order item whose order has not arrived yet or an order whose customer is gone.
+TABLE_LEVELS = {"customers": 0, "products": 0, "orders": 1, "inventory": 1, "order_items": 2}
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+
+def normalize_op(op):
+    """Maps INSERT/UPDATE (as written by a change log or trigger) to upsert, DELETE to delete."""
+    return DELETE if op.upper() == "DELETE" else UPSERT
+
+
+def plan_batch(changes):
+    """
+    Turns an ordered list of changes into stages that can each be applied in parallel.
+
+    Each change is a dict with "table", "op" (INSERT/UPDATE/DELETE), "pk" and, for
+    inserts/updates, "row" (column -> value, the full new row image). Only the last
+    change per (table, pk) in the batch matters because every change carries the full
+    row, so earlier changes to the same key are dropped; this is what keeps per-key
+    order intact when different keys run in parallel.
+    :return: List of (op, level, changes) stages in the order they must be applied.
+    """
+    latest = {}
+    for change in changes:
+        latest[(change["table"], change["pk"])] = change # Later changes overwrite earlier ones
+
+    stages = {}
+    for change in latest.values():
+        op = normalize_op(change["op"])
+        stages.setdefault((op, TABLE_LEVELS[change["table"]]), []).append(change)
+
+    upsert_levels = sorted(level for op, level in stages if op == UPSERT)
+    delete_levels = sorted((level for op, level in stages if op == DELETE), reverse=True)
+    return ([(UPSERT, level, stages[(UPSERT, level)]) for level in upsert_levels]
+            + [(DELETE, level, stages[(DELETE, level)]) for level in delete_levels])
+
+
+def partition_changes(changes, worker_count):
+    """Hash-partitions changes by (table, pk) so a given key is always applied by the same worker."""
+    partitions = [[] for _ in range(worker_count)]
+    for change in changes:
+        partitions[hash((change["table"], change["pk"])) % worker_count].append(change)
+    return partitions
+
+
+def check_bulk_results(results, op, table):
+    """crate.client reports rejected bulk rows as rowcount -2 instead of raising; turn them into an error."""
+    rejected = sum(1 for result in results or [] if result.get("rowcount") == -2)
+    if rejected:
+        raise RuntimeError(f"CrateDB rejected {rejected} rows in a bulk {op} on {table}")
+
+
+def upsert_sql(table):
+    columns = TABLE_COLUMNS[table]
+    pk = PRIMARY_KEYS[table]
+    placeholders = ", ".join(["?"] * len(columns))
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != pk)
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) ON CONFLICT ({pk}) DO UPDATE SET {updates}"
+
+
+def delete_sql(table):
+    return f"DELETE FROM {table} WHERE {PRIMARY_KEYS[table]} = ?"
+
+
+class ParallelApplier:
+    """
+    Applies change batches to CrateDB over several connections at once.
+
+    Changes are hash-partitioned by (table, primary key) across worker connections, so
+    different keys are written in parallel while each key stays on one worker. Batches
+    are applied one after another and, within a batch, dependency stages (see
+    plan_batch) are separated by a barrier, so per-key order and parent/child order
+    both hold. Each worker sends its share of a stage as one bulk request per table.
+    Re-applying a batch is harmless: upserts and deletes by primary key are idempotent.
+    """
+
+    def __init__(self, crate_url, worker_count=DEFAULT_WORKER_COUNT):
+        """
+        :param crate_url: CrateDB "host:port", as used by crate_client.connect.
+        :param worker_count: Number of parallel worker connections.
+        """
+        self.worker_count = worker_count
+        self.connections = [crate_client.connect(crate_url) for _ in range(worker_count)]
+        self.cursors = [conn.cursor() for conn in self.connections]
+        self.executor = ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix="sync-apply")
+        self.changes_received = 0
+        self.changes_applied = 0
+        self.apply_seconds = 0.0
+
+    def apply_batch(self, changes):
+        """
+        Applies one ordered batch of changes and returns once all of it is in CrateDB.
+        :param changes: List of change dicts (see plan_batch), oldest first.
+        :return: Number of changes written after collapsing repeated keys.
+        """
+        start_time = time.time()
+        applied = 0
+        for op, level, stage_changes in plan_batch(changes):
+            futures = [
+                self.executor.submit(self._apply_partition, worker_id, op, partition)
+                for worker_id, partition in enumerate(partition_changes(stage_changes, self.worker_count))
+                if partition
+            ]
+            for future in futures:
+                future.result() # Barrier between stages; re-raises the first worker error
+            applied += len(stage_changes)
+
+        self.changes_received += len(changes)
+        self.changes_applied += applied
+        self.apply_seconds += time.time() - start_time
+        return applied
+
+    def _apply_partition(self, worker_id, op, changes):
+        # Only one task per worker is in flight per stage, so the worker's cursor is never shared.
+        cursor = self.cursors[worker_id]
+        by_table = {}
+        for change in changes:
+            by_table.setdefault(change["table"], []).append(change)
+        for table, table_changes in by_table.items():
+            if op == UPSERT:
+                columns = TABLE_COLUMNS[table]
+                results = cursor.executemany(upsert_sql(table), [tuple(change["row"][column] for column in columns) for change in table_changes])
+            else:
+                results = cursor.executemany(delete_sql(table), [(change["pk"],) for change in table_changes])
+            # Raising fails the stage barrier in apply_batch, so callers never checkpoint past lost rows
+            check_bulk_results(results, op, table)
+
+    def throughput(self):
+        """Changes received per second of apply time so far."""
+        return self.changes_received / self.apply_seconds if self.apply_seconds > 0 else 0.0
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for conn in self.connections:
+            conn.close()
+
+
+# --- Demo: re-sync rows read from PostgreSQL with 1..N workers and compare throughput ---
+if __name__ == "__main__":
+    import psycopg2
+
+    PG_HOST = "localhost"
+    PG_PORT = 5436 # IMPORTANT: New PostgreSQL Port
+    PG_DBNAME = "postgres"
+    PG_USER = "postgres"
+    PG_PASSWORD = "your_new_strong_password_v2" # IMPORTANT: Your new PG password
+
+    CRATE_HOST = "localhost"
+    CRATE_PORT = 4203 # IMPORTANT: New CrateDB Port
+
+    DEMO_ROWS_PER_TABLE = 20000
+    DEMO_BATCH_SIZE = 5000
+    DEMO_WORKER_COUNTS = [1, 2, 4, 8]
+
+    try:
+        pg_conn = psycopg2.connect(f"host={PG_HOST} port={PG_PORT} dbname={PG_DBNAME} user={PG_USER} password={PG_PASSWORD}")
+        pg_cursor = pg_conn.cursor()
+        print("Connected to PostgreSQL successfully!")
+    except Exception as e:
+        print(f"Error connecting to PostgreSQL (Port {PG_PORT}): {e}")
+        exit()
+
+    # Rows are copied unchanged, so the demo leaves CrateDB consistent with PostgreSQL.
+    print(f"\nReading {DEMO_ROWS_PER_TABLE} rows per table from PostgreSQL...")
+    demo_changes = []
+    for table, columns in TABLE_COLUMNS.items():
+        pg_cursor.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY {PRIMARY_KEYS[table]} LIMIT %s;", (DEMO_ROWS_PER_TABLE,))
+        for row in pg_cursor.fetchall():
+            demo_changes.append({"table": table, "op": "UPDATE", "pk": row[0], "row": dict(zip(columns, row))})
+    pg_conn.commit()
+    pg_cursor.close()
+    pg_conn.close()
+
+    print("\n--- Parallel Apply Throughput ---")
+    for worker_count in DEMO_WORKER_COUNTS:
+        applier = ParallelApplier(f"{CRATE_HOST}:{CRATE_PORT}", worker_count)
+        for i in range(0, len(demo_changes), DEMO_BATCH_SIZE):
+            applier.apply_batch(demo_changes[i:i + DEMO_BATCH_SIZE])
+        print(f"  {worker_count} worker(s): {applier.changes_applied} changes in {applier.apply_seconds:.2f} seconds "
+              f"({applier.throughput():.0f} changes/sec)")
+        applier.close()
@@ -2,8 +2,11 @@ import psycopg2
 from crate import client as crate_client
 import time
 import random
+import json
+import os
 from datetime import datetime, timedelta
 from faker import Faker
+from resource_sampler import ResourceSampler, SAMPLE_INTERVAL
 
 fake = Faker()
 
@@ -17,12 +20,32 @@ PG_PASSWORD = "your_new_strong_password_v2" # IMPORTANT: Your new PG password
 CRATE_HOST = "localhost"
 CRATE_PORT = 4203 # IMPORTANT: New CrateDB Port
 
-RECORD_COUNT = 1000000 # Total records inserted per table
+RECORD_COUNT = int(os.environ.get("RECORD_COUNT", 1000000)) # Total records inserted per table
+PG_PARALLEL_WORKERS = os.environ.get("PG_PARALLEL_WORKERS") # max_parallel_workers_per_gather; unset = server default
+BENCH_ENGINES = os.environ.get("BENCH_ENGINES", "PostgreSQL,CrateDB").split(",") # Engines whose tests are run
+
+RESULTS_FILE = os.environ.get("RESULTS_FILE", "performance_results.json") # Client and server-side timings for every test are written here
+DATASET_PROFILE_FILE = "dataset_profile.json" # Written by data_generator_v2_bulk_1m.py, copied into the results
+
+dataset_profile = None
+if os.path.exists(DATASET_PROFILE_FILE):
+    with open(DATASET_PROFILE_FILE) as f:
+        dataset_profile = json.load(f)
+    print(f"Dataset distribution profile: {dataset_profile['distribution_profile']} (seed {dataset_profile['random_seed']}, "
+          f"{len(dataset_profile.get('steps', []))} load step(s))")
+else:
+    print(f"WARNING: {DATASET_PROFILE_FILE} not found; results will not record the data distribution.")
 
 # --- Connect to PostgreSQL ---
 try:
     pg_conn = psycopg2.connect(f"host={PG_HOST} port={PG_PORT} dbname={PG_DBNAME} user={PG_USER} password={PG_PASSWORD}")
     pg_cursor = pg_conn.cursor()
+    # Benchmark writes are throwaway: keep them out of the sync change log even if capture is enabled
+    pg_cursor.execute("SET session_replication_role = replica;")
+    pg_conn.commit()
+    if PG_PARALLEL_WORKERS is not None:
+        pg_cursor.execute(f"SET max_parallel_workers_per_gather = {int(PG_PARALLEL_WORKERS)};")
+        pg_conn.commit()
     print("Connected to PostgreSQL successfully!")
 except Exception as e:
     print(f"Error connecting to PostgreSQL (Port {PG_PORT}): {e}")
@@ -37,6 +60,43 @@ except Exception as e:
     print(f"Error connecting to CrateDB (Port {CRATE_PORT}): {e}")
     exit()
 
+# --- Dedicated connections for server-side resource sampling ---
+# Kept separate from the benchmarked connections so polling never blocks or pollutes a test.
+try:
+    pg_stats_conn = psycopg2.connect(f"host={PG_HOST} port={PG_PORT} dbname={PG_DBNAME} user={PG_USER} password={PG_PASSWORD}")
+    pg_stats_conn.autocommit = True # Each poll must see fresh statistics, not a transaction snapshot
+    crate_stats_conn = crate_client.connect(f"{CRATE_HOST}:{CRATE_PORT}")
+    print(f"Resource sampler connections ready (interval {SAMPLE_INTERVAL}s).")
+except Exception as e:
+    print(f"Error opening resource sampler connections: {e}")
+    exit()
+
+samplers = {
+    "PostgreSQL": ResourceSampler("PostgreSQL", pg_stats_conn),
+    "CrateDB": ResourceSampler("CrateDB", crate_stats_conn),
+}
+test_results = [] # One entry per test/engine, dumped to RESULTS_FILE at the end
+
+def record_result(db_type, test_name, duration, server_stats):
+    """Stores a test result and prints how much of the wall time the engine itself spent."""
+    test_results.append({
+        "db_type": db_type,
+        "test_name": test_name,
+        "client_seconds": duration,
+        "server": server_stats,
+    })
+    server_ms = server_stats.get("server_time_ms")
+    if server_ms is None or duration < 0:
+        return
+    overhead_ms = duration * 1000 - server_ms
+    line = f"    {db_type} - {test_name} server: {server_ms:.1f} ms, network/driver overhead: {overhead_ms:.1f} ms"
+    if server_stats.get("buffer_hits") is not None:
+        line += f", buffer hits/reads: {server_stats['buffer_hits']}/{server_stats['buffer_reads']}"
+    peaks = server_stats.get("peaks", {})
+    if "cpu_percent" in peaks:
+        line += f", peak CPU: {peaks['cpu_percent']}%, peak heap: {peaks['heap_used_bytes'] / (1024 * 1024):.0f} MB"
+    print(line)
+
 # --- Helper function for running and measuring tests ---
 def run_test(db_cursor, db_type, test_name, query, params=None, commit_required=False, fetch_results=False, explain_query=False):
     """
@@ -49,9 +109,11 @@ def run_test(db_cursor, db_type, test_name, query, params=None, commit_required=
     :param commit_required: Boolean, True if a commit is needed (e.g., for DML in PostgreSQL).
     :param fetch_results: Boolean, True if results should be fetched (e.g., for SELECT COUNT).
     :param explain_query: Boolean, True if EXPLAIN output should be fetched.
-    :return: The execution time in seconds, or -1 if an error occurred.
+    :return: The execution time in seconds, -1 if an error occurred, or None if db_type is not benchmarked.
     """
-    start_time = time.time()
+    if db_type not in BENCH_ENGINES:
+        return None
+    sampler = samplers[db_type]
     try:
         if explain_query:
             explain_sql = f"EXPLAIN {query}"
@@ -60,10 +122,10 @@ def run_test(db_cursor, db_type, test_name, query, params=None, commit_required=
             print(f"    {db_type} - {test_name} EXPLAIN Plan:")
             for row in explain_output:
                 print(f"        {row[0]}") # EXPLAIN output is usually in one column
-            start_time = time.time() # Reset timer for actual query execution
-            db_cursor.execute(query, params) # Execute actual query
-        else:
-            db_cursor.execute(query, params)
+
+        sampler.start() # Started after EXPLAIN so only the actual query is attributed to the test
+        start_time = time.time()
+        db_cursor.execute(query, params)
 
         if commit_required and db_type == "PostgreSQL":
             pg_conn.commit()
@@ -76,11 +138,14 @@ def run_test(db_cursor, db_type, test_name, query, params=None, commit_required=
         duration = end_time - start_time
         result_str = f"Result: {result[0]}" if result and len(result) > 0 else ""
         print(f"  {db_type} - {test_name}: {duration:.4f} seconds {result_str}")
+        record_result(db_type, test_name, duration, sampler.stop())
         return duration
     except Exception as e:
         print(f"  {db_type} - {test_name} FAILED: {e}")
         if commit_required and db_type == "PostgreSQL":
             pg_conn.rollback()
+        if sampler.running:
+            record_result(db_type, test_name, -1, sampler.stop())
         return -1
 
 # --- Performance Test Scenarios ---
@@ -101,23 +166,33 @@ for i in range(BULK_INSERT_TEST_COUNT):
 pg_insert_bulk_query_test = "INSERT INTO customers (customer_id, name, email, registration_date, status) VALUES (%s, %s, %s, %s, %s);"
 crate_insert_bulk_query_test = "INSERT INTO customers (customer_id, name, email, registration_date, status) VALUES (?, ?, ?, ?, ?);"
 
-print("  Preparing PostgreSQL bulk insert test...")
-pg_start_time = time.time()
-try:
-    pg_cursor.executemany(pg_insert_bulk_query_test, customer_data_batch_test)
-    pg_conn.commit()
-    print(f"  PostgreSQL - Bulk Insert Test: {time.time() - pg_start_time:.4f} seconds")
-except Exception as e:
-    print(f"  PostgreSQL - Bulk Insert Test FAILED: {e}")
-    pg_conn.rollback()
+if "PostgreSQL" in BENCH_ENGINES:
+    print("  Preparing PostgreSQL bulk insert test...")
+    samplers["PostgreSQL"].start()
+    pg_start_time = time.time()
+    try:
+        pg_cursor.executemany(pg_insert_bulk_query_test, customer_data_batch_test)
+        pg_conn.commit()
+        pg_duration = time.time() - pg_start_time
+        print(f"  PostgreSQL - Bulk Insert Test: {pg_duration:.4f} seconds")
+    except Exception as e:
+        print(f"  PostgreSQL - Bulk Insert Test FAILED: {e}")
+        pg_conn.rollback()
+        pg_duration = -1
+    record_result("PostgreSQL", "Bulk Insert Test", pg_duration, samplers["PostgreSQL"].stop())
 
-print("  Preparing CrateDB bulk insert test...")
-crate_start_time = time.time()
-try:
-    crate_cursor.executemany(crate_insert_bulk_query_test, customer_data_batch_test)
-    print(f"  CrateDB - Bulk Insert Test: {time.time() - crate_start_time:.4f} seconds")
-except Exception as e:
-    print(f"  CrateDB - Bulk Insert Test FAILED: {e}")
+if "CrateDB" in BENCH_ENGINES:
+    print("  Preparing CrateDB bulk insert test...")
+    samplers["CrateDB"].start()
+    crate_start_time = time.time()
+    try:
+        crate_cursor.executemany(crate_insert_bulk_query_test, customer_data_batch_test)
+        crate_duration = time.time() - crate_start_time
+        print(f"  CrateDB - Bulk Insert Test: {crate_duration:.4f} seconds")
+    except Exception as e:
+        print(f"  CrateDB - Bulk Insert Test FAILED: {e}")
+        crate_duration = -1
+    record_result("CrateDB", "Bulk Insert Test", crate_duration, samplers["CrateDB"].stop())
 
 # Clean up this test data
 run_test(pg_cursor, "PostgreSQL", "Cleanup PG Test Data", f"DELETE FROM customers WHERE customer_id >= {STARTING_CUSTOMER_ID_TEST};", commit_required=True)
@@ -208,8 +283,23 @@ run_test(crate_cursor, "CrateDB", "Spend by Active Customers", crate_complex_que
 
 print("\n--- All Performance Tests Complete ---")
 
+# --- Save results (client wall time + server-side statistics) ---
+with open(RESULTS_FILE, "w") as f:
+    json.dump({
+        "record_count": RECORD_COUNT,
+        "pg_parallel_workers": PG_PARALLEL_WORKERS,
+        "bench_engines": BENCH_ENGINES,
+        "dataset": dataset_profile, # Includes the per-step load history under "steps"
+        "sample_interval": SAMPLE_INTERVAL,
+        "run_at": datetime.now().isoformat(),
+        "results": test_results,
+    }, f, indent=2, default=str)
+print(f"Results written to {RESULTS_FILE}.")
+
 # --- Close connections ---
 pg_cursor.close()
 pg_conn.close()
 crate_conn.close()
+pg_stats_conn.close()
+crate_stats_conn.close()
 print("Connections closed.")
@@ -0,0 +1,261 @@
+import re
+import time
+
+# --- Router Configuration ---
+DEFAULT_MAX_STALENESS = 5.0 # Seconds CrateDB may lag behind PostgreSQL before reads go to PostgreSQL
+WATERMARK_CACHE_SECONDS = 0.5 # Re-read the sync watermark at most this often
+CRATE_REFRESH_INTERVAL = 1.0 # CrateDB makes new writes searchable after a refresh (default 1s), counted as extra lag
+WATERMARK_SOURCE = "postgresql" # Row key written by sync_service.py (the only writer) into sync_watermark
+
+# Primary key of every table, used to spot point lookups
+PRIMARY_KEYS = {
+    "customers": "customer_id",
+    "products": "product_id",
+    "orders": "order_id",
+    "order_items": "item_id",
+    "inventory": "inventory_id",
+}
+# Columns with a FULLTEXT index in CrateDB (see crate_tables_schema in db_setup_v2.py)
+FULLTEXT_COLUMNS = {"description"}
+
+# Query classes
+WRITE = "write"
+POINT_LOOKUP = "point_lookup"
+ANALYTICAL = "analytical"
+OTHER = "other"
+
+# Searched anywhere, so data-modifying CTEs (WITH ... DELETE ... RETURNING) and locking reads
+# (SELECT ... FOR UPDATE/SHARE) count as writes; a false match only keeps a read on PostgreSQL.
+WRITE_RE = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE|CREATE|ALTER|DROP|TRUNCATE)\b|\bFOR\s+(NO\s+KEY\s+)?(UPDATE|SHARE)\b|\bFOR\s+KEY\s+SHARE\b",
+    re.IGNORECASE,
+)
+ANALYTICAL_RE = re.compile(r"\bJOIN\b|\bGROUP\s+BY\b|\b(SUM|AVG|COUNT|MIN|MAX|DATE_TRUNC|DATE_BIN)\s*\(|\bI?LIKE\b|\bMATCH\s*\(", re.IGNORECASE)
+FROM_TABLE_RE = re.compile(r"\bFROM\s+(\w+)", re.IGNORECASE)
+DATE_TRUNC_RE = re.compile(r"DATE_TRUNC\(\s*'(second|minute|hour|day)'\s*,\s*([\w.]+)\s*\)", re.IGNORECASE)
+INTERVAL_PLURAL_RE = re.compile(r"INTERVAL\s+'(\d+)\s+(second|minute|hour|day)s'", re.IGNORECASE)
+ILIKE_RE = re.compile(r"([\w.]+)\s+ILIKE\s+%s", re.IGNORECASE)
+
+
+def translate_to_crate(query, params=None):
+    """
+    Rewrites a PostgreSQL-dialect query into CrateDB's dialect.
+    Covers the differences seen in performance_tester_v2.py:
+      - %s placeholders -> ?
+      - DATE_TRUNC('day', col) -> DATE_BIN(INTERVAL '1 day', col::timestamp with time zone, 0::timestamp)
+      - INTERVAL '365 days' -> INTERVAL '365 day'
+      - col ILIKE %s on a FULLTEXT column -> MATCH(col, ?) with the % wildcards stripped from the term.
+        MATCH is term based, so counts can differ from a substring ILIKE (same trade-off as Test 4).
+    :param query: The PostgreSQL query string.
+    :param params: A tuple of parameters for the query (or None).
+    :return: (crate_query, crate_params)
+    """
+    params = list(params) if params else []
+
+    # ILIKE -> MATCH needs the placeholder position to rewrite the matching parameter
+    for match in reversed(list(ILIKE_RE.finditer(query))):
+        column = match.group(1)
+        if column.split(".")[-1] not in FULLTEXT_COLUMNS:
+            continue
+        param_index = query[:match.start()].count("%s")
+        if param_index < len(params) and isinstance(params[param_index], str):
+            params[param_index] = params[param_index].strip("%")
+        query = f"{query[:match.start()]}MATCH({column}, %s){query[match.end():]}"
+
+    query = DATE_TRUNC_RE.sub(
+        lambda m: f"DATE_BIN(INTERVAL '1 {m.group(1).lower()}', {m.group(2)}::timestamp with time zone, 0::timestamp)",
+        query,
+    )
+    query = INTERVAL_PLURAL_RE.sub(lambda m: f"INTERVAL '{m.group(1)} {m.group(2).lower()}'", query)
+    query = query.replace("%s", "?")
+    return query, tuple(params) if params else None
+
+
+class QueryRouter:
+    """
+    Sends each read to PostgreSQL or CrateDB depending on the query shape and on how far
+    CrateDB lags behind PostgreSQL.
+
+    Writes, point lookups by primary key and unclassified queries always go to PostgreSQL
+    (the source of truth, and already fast for single rows). Analytical queries (joins,
+    aggregations, time bucketing, text search) go to CrateDB when its sync watermark is
+    within the caller's max staleness, otherwise to PostgreSQL. Queries are written in
+    PostgreSQL's dialect and translated for CrateDB.
+    """
+
+    def __init__(self, pg_conn, crate_conn, default_max_staleness=DEFAULT_MAX_STALENESS):
+        """
+        :param pg_conn: An open psycopg2 connection.
+        :param crate_conn: An open crate.client connection.
+        :param default_max_staleness: Seconds of CrateDB lag tolerated when the caller gives none.
+        """
+        self.pg_conn = pg_conn
+        self.crate_conn = crate_conn
+        self.pg_cursor = pg_conn.cursor()
+        self.crate_cursor = crate_conn.cursor()
+        self.default_max_staleness = default_max_staleness
+        self.decisions = [] # One dict per executed query, see report()
+        self._synced_at = None
+        self._watermark_checked_at = 0.0
+
+    def classify(self, query):
+        if WRITE_RE.search(query):
+            return WRITE
+        if ANALYTICAL_RE.search(query):
+            return ANALYTICAL
+        from_match = FROM_TABLE_RE.search(query)
+        if from_match:
+            pk = PRIMARY_KEYS.get(from_match.group(1).lower())
+            if pk and re.search(rf"\bWHERE\s+(\w+\.)?{pk}\s*=\s*(%s|\d+)", query, re.IGNORECASE):
+                return POINT_LOOKUP
+        return OTHER
+
+    def sync_lag(self):
+        """Seconds CrateDB is behind PostgreSQL according to the sync watermark, or None if unknown."""
+        now = time.time()
+        # Only the watermark is cached; the lag is computed against the current time on every call
+        if now - self._watermark_checked_at >= WATERMARK_CACHE_SECONDS:
+            try:
+                self.crate_cursor.execute("SELECT synced_at FROM sync_watermark WHERE source = ?;", (WATERMARK_SOURCE,))
+                row = self.crate_cursor.fetchone()
+                # crate.client returns TIMESTAMP values as epoch milliseconds
+                self._synced_at = row[0] / 1000.0 if row and row[0] is not None else None
+            except Exception as e:
+                print(f"  Router: could not read sync watermark: {e}")
+                self._synced_at = None
+            self._watermark_checked_at = now
+        if self._synced_at is None:
+            return None
+        return max(0.0, now - self._synced_at) + CRATE_REFRESH_INTERVAL
+
+    def route(self, query, max_staleness=None):
+        """
+        Decides where a query should run.
+        :return: (engine, query_class, reason) with engine "PostgreSQL" or "CrateDB".
+        """
+        query_class = self.classify(query)
+        if query_class != ANALYTICAL:
+            return "PostgreSQL", query_class, f"{query_class} queries stay on PostgreSQL"
+        if max_staleness is None:
+            max_staleness = self.default_max_staleness
+        lag = self.sync_lag()
+        if lag is None:
+            return "PostgreSQL", query_class, "CrateDB sync watermark unavailable"
+        if lag > max_staleness:
+            return "PostgreSQL", query_class, f"CrateDB lag {lag:.2f}s > max staleness {max_staleness:.2f}s"
+        return "CrateDB", query_class, f"CrateDB lag {lag:.2f}s <= max staleness {max_staleness:.2f}s"
+
+    def execute(self, query, params=None, max_staleness=None):
+        """
+        Routes and runs a PostgreSQL-dialect query. Falls back to PostgreSQL if CrateDB fails.
+        :param query: The SQL query string (PostgreSQL dialect, %s placeholders).
+        :param params: A tuple of parameters for the query (or None).
+        :param max_staleness: Seconds of CrateDB lag the caller accepts (None = router default).
+        :return: The fetched rows, or None for statements without a result set.
+        """
+        engine, query_class, reason = self.route(query, max_staleness)
+        if engine == "CrateDB":
+            crate_query, crate_params = translate_to_crate(query, params)
+            start_time = time.time()
+            try:
+                self.crate_cursor.execute(crate_query, crate_params)
+                rows = self.crate_cursor.fetchall() if self.crate_cursor.description else None
+                self._record(query, query_class, engine, reason, time.time() - start_time)
+                return rows
+            except Exception as e:
+                print(f"  Router: CrateDB FAILED ({e}), falling back to PostgreSQL")
+                engine, reason = "PostgreSQL", f"CrateDB error: {e}"
+
+        start_time = time.time()
+        try:
+            self.pg_cursor.execute(query, params)
+            rows = self.pg_cursor.fetchall() if self.pg_cursor.description else None
+            self.pg_conn.commit() # Commits writes and ends the read transaction so it does not sit idle
+        except Exception:
+            self.pg_conn.rollback()
+            raise
+        self._record(query, query_class, engine, reason, time.time() - start_time)
+        return rows
+
+    def _record(self, query, query_class, engine, reason, duration):
+        self.decisions.append({
+            "query": " ".join(query.split())[:120],
+            "query_class": query_class,
+            "engine": engine,
+            "reason": reason,
+            "seconds": duration,
+        })
+
+    def report(self):
+        """Prints every routing decision and the average latency per query class and engine."""
+        print("\n--- Routing Decisions ---")
+        for decision in self.decisions:
+            print(f"  [{decision['query_class']}] -> {decision['engine']} in {decision['seconds']:.4f}s ({decision['reason']}): {decision['query']}")
+
+        print("\n--- Average Latency by Query Class and Engine ---")
+        totals = {}
+        for decision in self.decisions:
+            key = (decision["query_class"], decision["engine"])
+            count, seconds = totals.get(key, (0, 0.0))
+            totals[key] = (count + 1, seconds + decision["seconds"])
+        for (query_class, engine), (count, seconds) in sorted(totals.items()):
+            print(f"  {query_class:<13} {engine:<10} queries: {count:>4}  avg: {seconds / count:.4f}s")
+
+        offloaded = [d for d in self.decisions if d["engine"] == "CrateDB"]
+        print(f"  Offloaded to CrateDB: {len(offloaded)} of {len(self.decisions)} queries, "
+              f"{sum(d['seconds'] for d in offloaded):.4f}s spent on CrateDB.")
+
+
+# --- Demo: route the benchmark queries (Tests 2-5) plus a point lookup ---
+if __name__ == "__main__":
+    import psycopg2
+    from crate import client as crate_client
+
+    PG_HOST = "localhost"
+    PG_PORT = 5436 # IMPORTANT: New PostgreSQL Port
+    PG_DBNAME = "postgres"
+    PG_USER = "postgres"
+    PG_PASSWORD = "your_new_strong_password_v2" # IMPORTANT: Your new PG password
+
+    CRATE_HOST = "localhost"
+    CRATE_PORT = 4203 # IMPORTANT: New CrateDB Port
+
+    try:
+        pg_conn = psycopg2.connect(f"host={PG_HOST} port={PG_PORT} dbname={PG_DBNAME} user={PG_USER} password={PG_PASSWORD}")
+        crate_conn = crate_client.connect(f"{CRATE_HOST}:{CRATE_PORT}")
+        print("Connected to PostgreSQL and CrateDB successfully!")
+    except Exception as e:
+        print(f"Error connecting to databases: {e}")
+        exit()
+
+    router = QueryRouter(pg_conn, crate_conn)
+    demo_queries = [
+        ("Total Sales by Category", """
+            SELECT p.category, SUM(oi.quantity * oi.unit_price) AS total_sales
+            FROM order_items oi JOIN products p ON oi.product_id = p.product_id
+            GROUP BY p.category ORDER BY total_sales DESC;""", None),
+        ("Daily Order Count", """
+            SELECT DATE_TRUNC('day', order_date) AS order_day, COUNT(order_id) AS daily_orders
+            FROM orders WHERE order_date >= NOW() - INTERVAL '365 days'
+            GROUP BY 1 ORDER BY 1;""", None),
+        ("Full-Text Search", "SELECT COUNT(*) FROM products WHERE description ILIKE %s;", ("%lorem%",)),
+        ("Spend by Active Customers", """
+            SELECT c.status, SUM(o.total_amount) AS total_amount_spent
+            FROM customers c JOIN orders o ON c.customer_id = o.customer_id
+            WHERE c.status = %s GROUP BY c.status;""", ("active",)),
+        ("Customer Lookup", "SELECT name, email, status FROM customers WHERE customer_id = %s;", (1,)),
+    ]
+
+    print(f"\nCurrent CrateDB lag: {router.sync_lag()}")
+    # Run everything twice: once requiring perfectly fresh data (stays on PostgreSQL),
+    # once accepting an hour of lag (analytical queries move to CrateDB), to show the offload benefit.
+    for max_staleness in (0.0, 3600.0):
+        print(f"\n--- Routing with max staleness {max_staleness}s ---")
+        for name, query, params in demo_queries:
+            rows = router.execute(query, params, max_staleness=max_staleness)
+            print(f"  {name}: {len(rows) if rows is not None else 0} rows")
+
+    router.report()
+    pg_conn.close()
+    crate_conn.close()
+    print("Connections closed.")
@@ -0,0 +1,254 @@
+import threading
+import time
+
+# --- Sampler Configuration ---
+SAMPLE_INTERVAL = 0.5 # Seconds between background polls of the server statistics views
+
+# Statements issued by the sampler itself show up in the statistics views; they all start with this
+# comment (kept in pg_stat_statements and sys.jobs_log) so they can be skipped when attributing
+# server time to the test that is being measured.
+SAMPLER_MARKER = "/* resource_sampler */"
+
+
+def _is_sampler_statement(stmt):
+    return SAMPLER_MARKER in stmt
+
+
+class ResourceSampler:
+    """
+    Collects server-side statistics for one engine while a benchmark test runs.
+
+    start() takes a "before" snapshot and begins polling in a background thread,
+    stop() ends polling, takes an "after" snapshot and returns the deltas and peaks.
+    The connection passed in must be dedicated to the sampler (not the one being
+    benchmarked); for PostgreSQL it should be in autocommit mode so every poll sees
+    fresh statistics.
+
+    PostgreSQL:
+        pg_stat_statements  -> server execution time, calls, shared buffer hits/reads per statement
+                               (updated synchronously at statement end, so attributable per test)
+        pg_stat_database    -> database-wide block hits/reads, tuples returned, temp bytes
+        pg_statio_user_tables -> heap/index block hits/reads per table
+        (the last two are flushed lazily by backends -- up to 10s on PG15+ -- so they are
+        reported under "approximate" and may belong partly to neighbouring tests)
+        pg_stat_activity    -> peak active / waiting backends (polled)
+
+    pg_stat_statements must be preloaded and created, e.g. for the Docker image:
+        docker run ... postgres:latest -c shared_preload_libraries=pg_stat_statements
+        CREATE EXTENSION IF NOT EXISTS pg_stat_statements;
+    Without it server time and buffer counters are None for PostgreSQL (a warning is printed once).
+    The toplevel column needs PostgreSQL 14 or later.
+
+    CrateDB:
+        sys.jobs_log -> server execution time per statement (ended - started)
+        sys.nodes    -> peak heap used, CPU %, load and disk used (polled)
+        sys.shards   -> peak primary shard size and document count (polled)
+    """
+
+    def __init__(self, db_type, stats_conn, interval=SAMPLE_INTERVAL):
+        """
+        :param db_type: String, either "PostgreSQL" or "CrateDB".
+        :param stats_conn: A connection used only for reading the statistics views.
+        :param interval: Seconds between background polls.
+        """
+        self.db_type = db_type
+        self.stats_conn = stats_conn
+        self.cursor = stats_conn.cursor()
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._before = None
+        self._peaks = {}
+        self._poll_errors = []
+        self._pg_statements_available = True
+
+    # --- Public API ---
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        self._peaks = {}
+        self._poll_errors = []
+        self._before = self._snapshot()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._poll() # One final poll so very short tests still get a peak reading
+        after = self._snapshot()
+        stats = self._diff(self._before, after)
+        stats["peaks"] = dict(self._peaks)
+        if self._poll_errors:
+            stats["errors"] = sorted(set(self._poll_errors))
+        return stats
+
+    # --- Background polling ---
+    def _poll_loop(self):
+        while not self._stop_event.wait(self.interval):
+            self._poll()
+
+    def _poll(self):
+        polls = [self._poll_pg] if self.db_type == "PostgreSQL" else [self._poll_crate_nodes, self._poll_crate_shards]
+        for poll in polls: # Separate so one failing view does not hide the others
+            try:
+                poll()
+            except Exception as e:
+                self._poll_errors.append(f"{poll.__name__}: {e}")
+
+    def _record_peak(self, name, value):
+        if value is None:
+            return
+        if name not in self._peaks or value > self._peaks[name]:
+            self._peaks[name] = value
+
+    def _poll_pg(self):
+        self.cursor.execute(
+            f"{SAMPLER_MARKER} SELECT COUNT(*) FILTER (WHERE state = 'active'), "
+            "COUNT(*) FILTER (WHERE state = 'active' AND wait_event_type IS NOT NULL) "
+            "FROM pg_stat_activity WHERE datname = current_database() AND pid <> pg_backend_pid();"
+        )
+        active, waiting = self.cursor.fetchone()
+        self._record_peak("active_backends", active)
+        self._record_peak("waiting_backends", waiting)
+
+    def _poll_crate_nodes(self):
+        self.cursor.execute(
+            f"{SAMPLER_MARKER} SELECT MAX(heap['used']), MAX(os['cpu']['percent']), MAX(load['1']), MAX(fs['total']['used']) FROM sys.nodes;"
+        )
+        heap_used, cpu_used, load_1, disk_used = self.cursor.fetchone()
+        self._record_peak("heap_used_bytes", heap_used)
+        self._record_peak("cpu_percent", cpu_used)
+        self._record_peak("load_1m", load_1)
+        self._record_peak("disk_used_bytes", disk_used)
+
+    def _poll_crate_shards(self):
+        self.cursor.execute(f"{SAMPLER_MARKER} SELECT SUM(size), SUM(num_docs) FROM sys.shards WHERE \"primary\" = true;")
+        shard_size, shard_docs = self.cursor.fetchone()
+        self._record_peak("primary_shard_bytes", shard_size)
+        self._record_peak("primary_shard_docs", shard_docs)
+
+    # --- Before/after snapshots ---
+    def _snapshot(self):
+        if self.db_type == "PostgreSQL":
+            return self._snapshot_pg()
+        return self._snapshot_crate()
+
+    def _snapshot_pg(self):
+        snapshot = {"statements": {}, "database": None, "tables": {}}
+        if self._pg_statements_available:
+            try:
+                self.cursor.execute(
+                    f"{SAMPLER_MARKER} SELECT userid, queryid, toplevel, query, calls, total_exec_time, "
+                    "shared_blks_hit, shared_blks_read, rows "
+                    "FROM pg_stat_statements WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database());"
+                )
+                # The view is keyed by (userid, dbid, queryid, toplevel); dbid is fixed by the WHERE clause
+                for userid, queryid, toplevel, query, calls, exec_ms, blks_hit, blks_read, rows in self.cursor.fetchall():
+                    snapshot["statements"][(userid, queryid, toplevel)] = (query, calls, exec_ms, blks_hit, blks_read, rows)
+            except Exception as e:
+                # Extension not installed / not in shared_preload_libraries: keep going without it.
+                self._pg_statements_available = False
+                self._poll_errors.append(f"pg_stat_statements unavailable: {e}")
+                print(f"  WARNING: pg_stat_statements unavailable ({e}); PostgreSQL server time and buffer "
+                      "counters will not be reported. Start PostgreSQL with shared_preload_libraries=pg_stat_statements "
+                      "and run CREATE EXTENSION pg_stat_statements;")
+
+        self.cursor.execute(
+            f"{SAMPLER_MARKER} SELECT blks_hit, blks_read, tup_returned, tup_fetched, temp_bytes "
+            "FROM pg_stat_database WHERE datname = current_database();"
+        )
+        snapshot["database"] = self.cursor.fetchone()
+
+        self.cursor.execute(
+            f"{SAMPLER_MARKER} SELECT relname, COALESCE(heap_blks_hit, 0), COALESCE(heap_blks_read, 0), "
+            "COALESCE(idx_blks_hit, 0), COALESCE(idx_blks_read, 0) FROM pg_statio_user_tables;"
+        )
+        for relname, heap_hit, heap_read, idx_hit, idx_read in self.cursor.fetchall():
+            snapshot["tables"][relname] = (heap_hit, heap_read, idx_hit, idx_read)
+        return snapshot
+
+    def _snapshot_crate(self):
+        self.cursor.execute(f"{SAMPLER_MARKER} SELECT CURRENT_TIMESTAMP;")
+        return {"server_time": self.cursor.fetchone()[0]}
+
+    # --- Deltas ---
+    def _diff(self, before, after):
+        if self.db_type == "PostgreSQL":
+            return self._diff_pg(before, after)
+        return self._diff_crate(before, after)
+
+    def _diff_pg(self, before, after):
+        stats = {
+            "server_time_ms": None,
+            "statements": [],
+            "buffer_hits": None,
+            "buffer_reads": None,
+        }
+        if self._pg_statements_available:
+            total_exec_ms = 0.0
+            total_blks_hit = 0
+            total_blks_read = 0
+            for key, (query, calls, exec_ms, blks_hit, blks_read, rows) in after["statements"].items():
+                prev = before["statements"].get(key, (query, 0, 0.0, 0, 0, 0))
+                delta_calls = calls - prev[1]
+                if delta_calls <= 0 or _is_sampler_statement(query):
+                    continue
+                delta_exec_ms = exec_ms - prev[2]
+                total_exec_ms += delta_exec_ms
+                total_blks_hit += blks_hit - prev[3]
+                total_blks_read += blks_read - prev[4]
+                stats["statements"].append({
+                    "query": " ".join(query.split())[:200],
+                    "calls": delta_calls,
+                    "exec_ms": round(delta_exec_ms, 3),
+                    "shared_blks_hit": blks_hit - prev[3],
+                    "shared_blks_read": blks_read - prev[4],
+                    "rows": rows - prev[5],
+                })
+            stats["server_time_ms"] = round(total_exec_ms, 3)
+            stats["buffer_hits"] = total_blks_hit
+            stats["buffer_reads"] = total_blks_read
+
+        # Lazily flushed counters: context only, not reliably attributable to this test
+        approximate = {}
+        if before["database"] and after["database"]:
+            names = ("blks_hit", "blks_read", "tup_returned", "tup_fetched", "temp_bytes")
+            approximate["database"] = {name: a - b for name, a, b in zip(names, after["database"], before["database"])}
+
+        table_io = {}
+        for relname, values in after["tables"].items():
+            prev = before["tables"].get(relname, (0, 0, 0, 0))
+            delta = [a - b for a, b in zip(values, prev)]
+            if any(delta):
+                table_io[relname] = dict(zip(("heap_blks_hit", "heap_blks_read", "idx_blks_hit", "idx_blks_read"), delta))
+        approximate["tables"] = table_io
+        stats["approximate"] = approximate
+        return stats
+
+    def _diff_crate(self, before, after):
+        self.cursor.execute(
+            f"{SAMPLER_MARKER} SELECT stmt, started, ended, error FROM sys.jobs_log WHERE started >= ? AND started <= ? ORDER BY started;",
+            (before["server_time"], after["server_time"])
+        )
+        statements = []
+        total_exec_ms = 0
+        for stmt, started, ended, error in self.cursor.fetchall():
+            if _is_sampler_statement(stmt):
+                continue
+            exec_ms = ended - started
+            total_exec_ms += exec_ms
+            statements.append({
+                "query": " ".join(stmt.split())[:200],
+                "exec_ms": exec_ms,
+                "error": error,
+            })
+        return {
+            "server_time_ms": total_exec_ms,
+            "statements": statements,
+        }
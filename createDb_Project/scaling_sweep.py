@@ -0,0 +1,208 @@
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# --- Sweep Configuration ---
+# Dataset sizes (records per table) are loaded in ascending order; each step only inserts
+# the rows missing since the previous step (LOAD_START_ID), so the largest size is generated once.
+# PostgreSQL does not depend on the CrateDB shard count, so it is only loaded and measured during
+# the first shard configuration; later configurations recreate and reload CrateDB alone.
+SWEEP_SIZES = [100000, 1000000, 10000000]
+CRATE_SHARD_COUNTS = [4, 8, 16] # Each shard count needs the CrateDB tables recreated
+PG_PARALLEL_WORKERS = [0, 2, 4] # max_parallel_workers_per_gather for the query suite
+DISTRIBUTION_PROFILE = "uniform" # Loader value distribution (see DISTRIBUTION_PROFILES in the loader)
+RANDOM_SEED = 42 # Fixed so every shard configuration loads the same data
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SETUP_SCRIPT = "db_setup_v2.py"
+LOADER_SCRIPT = "data_generator_v2_bulk_1m.py"
+TESTER_SCRIPT = "performance_tester_v2.py"
+
+SWEEP_INGEST_FILE = "sweep_ingest_results.json"
+SWEEP_TEST_FILE = "sweep_performance_results.json"
+SWEEP_RESULTS_FILE = "scaling_results.json"
+
+
+# --- Helpers ---
+def run_script(script, env_overrides, results_file=None):
+    """
+    Runs one of the existing scripts with environment overrides and returns its JSON results.
+    :param script: Script file name inside SCRIPT_DIR.
+    :param env_overrides: Dict of environment variables read by the script.
+    :param results_file: JSON file the script writes, or None if it writes nothing.
+    :return: The parsed results, True for scripts without results, or None on failure.
+    """
+    env = dict(os.environ)
+    env.update({key: str(value) for key, value in env_overrides.items()})
+    results_path = os.path.join(SCRIPT_DIR, results_file) if results_file else None
+    if results_path and os.path.exists(results_path):
+        os.remove(results_path) # The scripts exit(0) on connection errors, so a stale file would hide a failure
+
+    print(f"\n>>> {script} {' '.join(f'{k}={v}' for k, v in env_overrides.items())}")
+    completed = subprocess.run([sys.executable, script], cwd=SCRIPT_DIR, env=env)
+    if completed.returncode != 0:
+        print(f"  {script} FAILED with exit code {completed.returncode}")
+        return None
+    if results_path is None:
+        return True
+    if not os.path.exists(results_path):
+        print(f"  {script} did not produce {results_file}")
+        return None
+    with open(results_path) as f:
+        return json.load(f)
+
+
+def fit_growth_rate(points):
+    """
+    Least-squares fit of log(y) = a + b * log(x).
+    :param points: List of (x, y) tuples with positive values.
+    :return: The exponent b (1.0 = linear growth, 0 = flat), or None with fewer than two points.
+    """
+    points = [(x, y) for x, y in points if x and y and x > 0 and y > 0]
+    if len(points) < 2:
+        return None
+    log_x = [math.log(x) for x, _ in points]
+    log_y = [math.log(y) for _, y in points]
+    mean_x = sum(log_x) / len(log_x)
+    mean_y = sum(log_y) / len(log_y)
+    var_x = sum((x - mean_x) ** 2 for x in log_x)
+    if var_x == 0:
+        return None
+    cov_xy = sum((x - mean_x) * (y - mean_y) for x, y in zip(log_x, log_y))
+    return cov_xy / var_x
+
+
+# --- Main Sweep ---
+def run_sweep():
+    print("--- Starting Scaling Sweep ---")
+    print(f"Sizes: {SWEEP_SIZES}, CrateDB shards: {CRATE_SHARD_COUNTS}, PG parallel workers: {PG_PARALLEL_WORKERS}")
+    sweep_start_time = time.time()
+    ingestion_points = [] # One per (shards, size) step
+    query_points = [] # One per (shards, workers, size, engine, test)
+    sizes = sorted(SWEEP_SIZES)
+
+    pg_pass_done = False
+    for shards in CRATE_SHARD_COUNTS:
+        print(f"\n=== CrateDB shards: {shards} ===")
+        include_pg = not pg_pass_done
+        recreate = "1" if include_pg else "crate"
+        if run_script(SETUP_SCRIPT, {"CRATE_SHARDS": shards, "RECREATE_TABLES": recreate}) is None:
+            continue
+        pg_pass_done = True
+        load_engines = "PostgreSQL,CrateDB" if include_pg else "CrateDB"
+
+        loaded_count = 0
+        for size in sizes:
+            ingest = run_script(
+                LOADER_SCRIPT,
+                {"RECORD_COUNT": size, "LOAD_START_ID": loaded_count + 1, "INGEST_RESULTS_FILE": SWEEP_INGEST_FILE,
+                 "DISTRIBUTION_PROFILE": DISTRIBUTION_PROFILE, "RANDOM_SEED": RANDOM_SEED, "LOAD_ENGINES": load_engines},
+                SWEEP_INGEST_FILE,
+            )
+            if ingest is None:
+                print(f"  Stopping this shard configuration at size {size}.")
+                break
+            loaded_count = size
+            ingestion_points.append({"shards": shards, "size": size, **ingest})
+
+            # CrateDB once per size; PostgreSQL once per worker setting, only in the first shard pass
+            runs = [("CrateDB", None)] + ([("PostgreSQL", workers) for workers in PG_PARALLEL_WORKERS] if include_pg else [])
+            for engine, workers in runs:
+                env_overrides = {"RECORD_COUNT": size, "BENCH_ENGINES": engine, "RESULTS_FILE": SWEEP_TEST_FILE}
+                if workers is not None:
+                    env_overrides["PG_PARALLEL_WORKERS"] = workers
+                results = run_script(TESTER_SCRIPT, env_overrides, SWEEP_TEST_FILE)
+                if results is None:
+                    continue
+                for result in results["results"]:
+                    if result["client_seconds"] < 0:
+                        continue
+                    query_points.append({
+                        "shards": shards if engine == "CrateDB" else None,
+                        "pg_parallel_workers": workers,
+                        "size": size,
+                        "db_type": result["db_type"],
+                        "test_name": result["test_name"],
+                        "client_seconds": result["client_seconds"],
+                        "server_time_ms": result["server"].get("server_time_ms"),
+                    })
+
+    curves = build_curves(ingestion_points, query_points)
+    print_curves(curves)
+
+    with open(os.path.join(SCRIPT_DIR, SWEEP_RESULTS_FILE), "w") as f:
+        json.dump({
+            "run_at": datetime.now().isoformat(),
+            "sizes": sizes,
+            "crate_shard_counts": CRATE_SHARD_COUNTS,
+            "pg_parallel_workers": PG_PARALLEL_WORKERS,
+            "distribution_profile": DISTRIBUTION_PROFILE,
+            "random_seed": RANDOM_SEED,
+            "ingestion": ingestion_points,
+            "queries": query_points,
+            "curves": curves,
+        }, f, indent=2)
+    print(f"\nScaling results written to {SWEEP_RESULTS_FILE}.")
+    print(f"--- Scaling Sweep Complete in {time.time() - sweep_start_time:.2f} seconds ---")
+
+
+def build_curves(ingestion_points, query_points):
+    """Groups the sweep points into curves over dataset size and fits a growth rate to each."""
+    curves = []
+
+    ingestion_series = {}
+    for point in ingestion_points:
+        for db_type, key in (("PostgreSQL", "pg_rows_per_sec"), ("CrateDB", "crate_rows_per_sec")):
+            # PG parallel workers do not affect loading, so ingestion curves are keyed by shards only
+            shards = point["shards"] if db_type == "CrateDB" else None
+            ingestion_series.setdefault((db_type, shards), []).append((point["size"], point[key]))
+    for (db_type, shards), points in ingestion_series.items():
+        if all(value is None for _, value in points):
+            continue # Engine was not loaded in this shard pass
+        curves.append({
+            "metric": "ingestion_rows_per_sec",
+            "db_type": db_type,
+            "test_name": "Incremental Load",
+            "shards": shards,
+            "pg_parallel_workers": None,
+            "points": points,
+            "growth_rate": fit_growth_rate(points),
+        })
+
+    latency_series = {}
+    for point in query_points:
+        key = (point["db_type"], point["test_name"], point["shards"], point["pg_parallel_workers"])
+        latency_series.setdefault(key, []).append((point["size"], point["client_seconds"]))
+    for (db_type, test_name, shards, workers), points in latency_series.items():
+        curves.append({
+            "metric": "latency_seconds",
+            "db_type": db_type,
+            "test_name": test_name,
+            "shards": shards,
+            "pg_parallel_workers": workers,
+            "points": points,
+            "growth_rate": fit_growth_rate(points),
+        })
+    return curves
+
+
+def print_curves(curves):
+    print("\n--- Scaling Curves (growth rate b in value ~ size^b) ---")
+    for curve in curves:
+        config = []
+        if curve["shards"] is not None:
+            config.append(f"shards={curve['shards']}")
+        if curve["pg_parallel_workers"] is not None:
+            config.append(f"pg_workers={curve['pg_parallel_workers']}")
+        config = ", ".join(config) or "-"
+        growth = f"{curve['growth_rate']:.2f}" if curve["growth_rate"] is not None else "n/a"
+        values = ", ".join(f"{size}: {value:.4g}" for size, value in curve["points"] if value is not None)
+        print(f"  {curve['db_type']} - {curve['test_name']} [{curve['metric']}] ({config}) b={growth} | {values}")
+
+
+if __name__ == "__main__":
+    run_sweep()
@@ -0,0 +1,315 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+from parallel_sync_applier import ParallelApplier, TABLE_COLUMNS, PRIMARY_KEYS, DEFAULT_WORKER_COUNT
+
+# --- Sync Service Configuration ---
+SERVICE_NAME = "pg_to_crate" # Checkpoint key, one per sync process
+CHECKPOINT_STORE = "crate" # "crate" (sync_checkpoints table) or "file" (CHECKPOINT_FILE)
+CHECKPOINT_FILE = "sync_checkpoint.json"
+SYNC_BATCH_SIZE = 5000 # Change-log rows applied (and checkpointed) per batch
+POLL_INTERVAL = 1.0 # Seconds to wait when there is nothing new to apply
+PRUNE_CHANGE_LOG = True # Delete change-log rows once their window is checkpointed
+WATERMARK_SOURCE = "postgresql" # Row key in CrateDB's sync_watermark table (read by query_router.py)
+
+# Requires the change-capture triggers: run db_setup_v2.py with ENABLE_CHANGE_CAPTURE=1.
+
+# --- How the position works ---
+# sync_change_log rows get a txid and an increasing change_id, but change_ids are handed out
+# before commit, so a row with a lower id can become visible after a higher one. The service
+# therefore works in windows of transaction ids: txid_snapshot_xmin() is the oldest transaction
+# still running, so every transaction below it has finished and all its rows are visible. A
+# window [window_lo, window_hi) is read in change_id pages; the checkpoint is
+# (window_lo, window_hi, last_change_id) and is saved after every applied page.
+# Applying a change re-reads the current row from PostgreSQL (or deletes it if it is gone), so
+# replaying a page after a crash, or applying changes out of commit order, converges to the
+# same state. On restart the service continues from the checkpoint: the work left is the
+# backlog in the change log, not the size of the tables.
+# A TRUNCATE is logged as one table-level marker. Pages are split at markers and the CrateDB
+# table is emptied at that point; TRUNCATE's exclusive lock means every write to that table
+# before it has a lower change_id and every write after it a higher one.
+
+INITIAL_CHECKPOINT = {"window_lo": 0, "window_hi": None, "last_change_id": 0, "window_synced_at": None}
+CHECKPOINT_FIELDS = ("window_lo", "window_hi", "last_change_id", "window_synced_at")
+TRUNCATE = "TRUNCATE" # op of the table-level markers logged by the truncate triggers (pk is NULL)
+
+# --- SQL and window steps shared with async_sync_service.py ---
+# CrateDB statements use ? placeholders, which both crate.client and the HTTP endpoint accept.
+LOAD_CHECKPOINT_SQL = (
+    "SELECT window_lo, window_hi, last_change_id, window_synced_at FROM sync_checkpoints WHERE service = ?"
+)
+SAVE_CHECKPOINT_SQL = (
+    "INSERT INTO sync_checkpoints (service, window_lo, window_hi, last_change_id, window_synced_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (service) DO UPDATE SET "
+    "window_lo = excluded.window_lo, window_hi = excluded.window_hi, last_change_id = excluded.last_change_id, "
+    "window_synced_at = excluded.window_synced_at, updated_at = excluded.updated_at"
+)
+UPDATE_WATERMARK_SQL = (
+    "INSERT INTO sync_watermark (source, synced_at) VALUES (?, ?) "
+    "ON CONFLICT (source) DO UPDATE SET synced_at = excluded.synced_at"
+)
+# Oldest running transaction, and a time before which every commit is below it:
+# transactions get their txid at their first write, so anything committed before the
+# oldest writer started has a smaller txid.
+OPEN_WINDOW_SQL = (
+    "SELECT txid_snapshot_xmin(txid_current_snapshot()), "
+    "EXTRACT(EPOCH FROM COALESCE((SELECT MIN(xact_start) FROM pg_stat_activity WHERE backend_xid IS NOT NULL), clock_timestamp()))"
+)
+
+
+def checkpoint_from_row(row):
+    return dict(zip(CHECKPOINT_FIELDS, row)) if row else None
+
+
+def checkpoint_args(service, checkpoint):
+    """Parameters for SAVE_CHECKPOINT_SQL."""
+    return (service, *(checkpoint[field] for field in CHECKPOINT_FIELDS), datetime.now(timezone.utc))
+
+
+def watermark_args(synced_at):
+    """Parameters for UPDATE_WATERMARK_SQL, or None when there is no commit time to publish yet."""
+    if synced_at is None:
+        return None
+    return (WATERMARK_SOURCE, datetime.fromtimestamp(synced_at, timezone.utc))
+
+
+def open_window(checkpoint, xmin, synced_at):
+    """Starts the window [window_lo, xmin) from an OPEN_WINDOW_SQL result; the caller saves the checkpoint."""
+    checkpoint["window_hi"] = max(xmin, checkpoint["window_lo"])
+    checkpoint["last_change_id"] = 0
+    checkpoint["window_synced_at"] = float(synced_at)
+
+
+def close_window(checkpoint):
+    """Moves the checkpoint past the finished window; returns its window_hi (change-log rows below it can be pruned)."""
+    window_hi = checkpoint["window_hi"]
+    checkpoint.update(window_lo=window_hi, window_hi=None, last_change_id=0)
+    return window_hi
+
+
+def current_rows_sql(table, keys_placeholder):
+    """Reads the current rows of a list of keys; keys_placeholder is %s (psycopg2) or $1::int[] (asyncpg)."""
+    return f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table} WHERE {PRIMARY_KEYS[table]} = ANY({keys_placeholder})"
+
+
+def log_segments(log_rows):
+    """
+    Splits a page of change-log rows (change_id, table_name, op, pk) at TRUNCATE markers.
+    :return: List of (truncated_table, rows) in log order: either (None, rows to apply) or (table, None).
+    """
+    segments = []
+    rows = []
+    for log_row in log_rows:
+        if log_row[2] == TRUNCATE:
+            if rows:
+                segments.append((None, rows))
+                rows = []
+            segments.append((log_row[1], None))
+        else:
+            rows.append(log_row)
+    if rows:
+        segments.append((None, rows))
+    return segments
+
+
+def clear_table_sql(table):
+    """CrateDB statements replaying a TRUNCATE; DELETE only sees refreshed rows, so refresh first."""
+    return [f"REFRESH TABLE {table}", f"DELETE FROM {table}"]
+
+
+def keys_by_table(log_rows):
+    """Groups change-log rows (change_id, table_name, op, pk) into table -> keys, keeping log order."""
+    keys = {}
+    for log_row in log_rows:
+        keys.setdefault(log_row[1], []).append(log_row[3])
+    return keys
+
+
+def current_row_changes(table, pks, rows):
+    """Turns the re-read rows of one table into changes; keys without a row become deletes."""
+    columns = TABLE_COLUMNS[table]
+    current_rows = {row[0]: row for row in rows}
+    changes = []
+    for pk in pks:
+        row = current_rows.get(pk)
+        if row is None:
+            changes.append({"table": table, "op": "DELETE", "pk": pk})
+        else:
+            changes.append({"table": table, "op": "UPDATE", "pk": pk, "row": dict(zip(columns, row))})
+    return changes
+
+
+class FileCheckpointStore:
+    """Checkpoint kept in a local JSON file, replaced atomically (write temp file, fsync, rename)."""
+
+    def __init__(self, path=CHECKPOINT_FILE):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self, checkpoint):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class CrateCheckpointStore:
+    """Checkpoint kept in CrateDB's sync_checkpoints table (created by db_setup_v2.py)."""
+
+    def __init__(self, crate_conn, service=SERVICE_NAME):
+        self.cursor = crate_conn.cursor()
+        self.service = service
+
+    def load(self):
+        # Primary key lookups are real-time in CrateDB, no REFRESH needed to read our own write
+        self.cursor.execute(LOAD_CHECKPOINT_SQL, (self.service,))
+        return checkpoint_from_row(self.cursor.fetchone())
+
+    def save(self, checkpoint):
+        self.cursor.execute(SAVE_CHECKPOINT_SQL, checkpoint_args(self.service, checkpoint))
+
+
+class SyncService:
+    """
+    Replicates PostgreSQL changes (sync_change_log) to CrateDB in checkpointed batches.
+    :param pg_conn: psycopg2 connection; switched to autocommit so every read sees fresh data.
+    :param crate_conn: crate.client connection for the watermark (and the checkpoint store).
+    :param applier: ParallelApplier writing the batches to CrateDB.
+    :param checkpoint_store: FileCheckpointStore or CrateCheckpointStore.
+    """
+
+    def __init__(self, pg_conn, crate_conn, applier, checkpoint_store, batch_size=SYNC_BATCH_SIZE):
+        pg_conn.autocommit = True
+        self.pg_conn = pg_conn
+        self.pg_cursor = pg_conn.cursor()
+        self.crate_cursor = crate_conn.cursor()
+        self.applier = applier
+        self.store = checkpoint_store
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint_store.load() or dict(INITIAL_CHECKPOINT)
+        self.changes_applied = 0
+        self.caught_up = False # True after closing a window that had nothing to apply
+
+    def sync_once(self):
+        """
+        Applies at most one batch. Opens a new txid window when none is open and closes the
+        window (watermark, pruning, checkpoint) once it has been read completely.
+        :return: Number of change-log rows applied (0 when the current window is exhausted).
+        """
+        self.caught_up = False
+        if self.checkpoint["window_hi"] is None:
+            self._open_window()
+
+        self.pg_cursor.execute(
+            "SELECT change_id, table_name, op, pk FROM sync_change_log "
+            "WHERE txid >= %s AND txid < %s AND change_id > %s ORDER BY change_id LIMIT %s;",
+            (self.checkpoint["window_lo"], self.checkpoint["window_hi"], self.checkpoint["last_change_id"], self.batch_size)
+        )
+        log_rows = self.pg_cursor.fetchall()
+        if not log_rows:
+            # last_change_id is reset when a window opens, so 0 here means the window was empty
+            self.caught_up = self.checkpoint["last_change_id"] == 0
+            self._close_window()
+            return 0
+
+        for truncated_table, segment_rows in log_segments(log_rows):
+            if truncated_table:
+                for stmt in clear_table_sql(truncated_table):
+                    self.crate_cursor.execute(stmt)
+            else:
+                self.applier.apply_batch(self._current_row_changes(segment_rows))
+        self.checkpoint["last_change_id"] = log_rows[-1][0]
+        self.store.save(self.checkpoint) # Only after the batch is in CrateDB; a crash before this replays it
+        self.changes_applied += len(log_rows)
+        return len(log_rows)
+
+    def run(self, max_idle_polls=None):
+        """
+        Syncs until interrupted (or until max_idle_polls consecutive empty polls, for catching up).
+        """
+        print(f"Resuming from checkpoint: {self.checkpoint}")
+        start_time = time.time()
+        idle_polls = 0
+        while max_idle_polls is None or idle_polls < max_idle_polls:
+            applied = self.sync_once()
+            if applied:
+                idle_polls = 0
+                print(f"  Applied {applied} changes (total {self.changes_applied}, checkpoint change_id {self.checkpoint['last_change_id']})")
+            elif self.caught_up:
+                # Only sleep when a fresh window was empty; after a busy window, open the next one at once
+                idle_polls += 1
+                time.sleep(POLL_INTERVAL)
+        print(f"Caught up: {self.changes_applied} changes applied in {time.time() - start_time:.2f} seconds.")
+
+    # --- Windows ---
+    def _open_window(self):
+        self.pg_cursor.execute(OPEN_WINDOW_SQL)
+        open_window(self.checkpoint, *self.pg_cursor.fetchone())
+        self.store.save(self.checkpoint)
+
+    def _close_window(self):
+        args = watermark_args(self.checkpoint["window_synced_at"])
+        if args:
+            self.crate_cursor.execute(UPDATE_WATERMARK_SQL, args)
+        window_hi = close_window(self.checkpoint)
+        self.store.save(self.checkpoint)
+        if PRUNE_CHANGE_LOG:
+            self.pg_cursor.execute("DELETE FROM sync_change_log WHERE txid < %s;", (window_hi,))
+
+    # --- Building changes ---
+    def _current_row_changes(self, log_rows):
+        """Re-reads the current PostgreSQL row for every logged key; keys without a row become deletes."""
+        changes = []
+        for table, pks in keys_by_table(log_rows).items():
+            self.pg_cursor.execute(current_rows_sql(table, "%s"), (list(set(pks)),))
+            changes.extend(current_row_changes(table, pks, self.pg_cursor.fetchall()))
+        return changes
+
+
+if __name__ == "__main__":
+    import psycopg2
+    from crate import client as crate_client
+
+    PG_HOST = "localhost"
+    PG_PORT = 5436 # IMPORTANT: New PostgreSQL Port
+    PG_DBNAME = "postgres"
+    PG_USER = "postgres"
+    PG_PASSWORD = "your_new_strong_password_v2" # IMPORTANT: Your new PG password
+
+    CRATE_HOST = "localhost"
+    CRATE_PORT = 4203 # IMPORTANT: New CrateDB Port
+
+    try:
+        pg_conn = psycopg2.connect(f"host={PG_HOST} port={PG_PORT} dbname={PG_DBNAME} user={PG_USER} password={PG_PASSWORD}")
+        print("Connected to PostgreSQL successfully!")
+    except Exception as e:
+        print(f"Error connecting to PostgreSQL (Port {PG_PORT}): {e}")
+        exit()
+
+    try:
+        crate_conn = crate_client.connect(f"{CRATE_HOST}:{CRATE_PORT}")
+        print("Connected to CrateDB successfully!")
+    except Exception as e:
+        print(f"Error connecting to CrateDB (Port {CRATE_PORT}): {e}")
+        exit()
+
+    store = CrateCheckpointStore(crate_conn) if CHECKPOINT_STORE == "crate" else FileCheckpointStore()
+    applier = ParallelApplier(f"{CRATE_HOST}:{CRATE_PORT}", DEFAULT_WORKER_COUNT)
+    service = SyncService(pg_conn, crate_conn, applier, store)
+    try:
+        service.run()
+    except KeyboardInterrupt:
+        print("\nStopping sync service (position is already checkpointed).")
+    finally:
+        applier.close()
+        pg_conn.close()
+        crate_conn.close()
+        print("Sync connections closed.")